@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import Field
+from typing import Optional, List, FrozenSet
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,13 +10,39 @@ class Settings(BaseSettings):
     chroma_db_path: str = Field("./chroma_db", env="CHROMA_DB_PATH")
     api_host: str = Field("0.0.0.0", env="API_HOST")
     api_port: int = Field(8000, env="API_PORT")
-    allowed_extensions: List[str] = Field(
-        default=[".md", ".markdown", ".pdf", ".docx", ".pptx", ".html", ".htm",
-                 ".txt", ".csv", ".png", ".jpg", ".jpeg", ".tiff", ".tif", ".eml", ".emlx",
-                 ".wav", ".mp3", ".m4a", ".flac", ".ogg"],
+    allowed_extensions: FrozenSet[str] = Field(
+        default=frozenset([".md", ".markdown", ".pdf", ".docx", ".pptx", ".html", ".htm",
+                           ".txt", ".csv", ".png", ".jpg", ".jpeg", ".tiff", ".tif", ".eml", ".emlx",
+                           ".wav", ".mp3", ".m4a", ".flac", ".ogg"]),
         env="ALLOWED_EXTENSIONS"
     )
 
+    @field_validator("allowed_extensions", mode="after")
+    @classmethod
+    def _normalize_extensions(cls, value: FrozenSet[str]) -> FrozenSet[str]:
+        # Lowercase, leading-dot form, so suffix checks everywhere are a single O(1) lookup
+        return frozenset(e.lower() if e.startswith(".") else "." + e.lower() for e in value)
+
+    # Worker processes used by /sync to chunk new files (0 = one less than the CPU count)
+    sync_workers: int = Field(0, env="SYNC_WORKERS")
+    # Fewest files worth starting that pool for; smaller batches (e.g. the watcher's
+    # periodic syncs) are chunked in-process, skipping worker start-up and imports
+    sync_pool_min_files: int = Field(32, env="SYNC_POOL_MIN_FILES")
+
+    # Threads used by /index and /reindex to load files concurrently
+    index_workers: int = Field(8, env="INDEX_WORKERS")
+
+    # Number of chunks /sync accumulates before each vector store insert
+    sync_batch_size: int = Field(200, env="SYNC_BATCH_SIZE")
+
+    # Chunks per Chroma upsert call for every index write
+    chroma_batch_size: int = Field(200, env="CHROMA_BATCH_SIZE")
+    # Threads persisting upsert batches while the next batch is embedded (0 = write inline)
+    chroma_writer_threads: int = Field(4, env="CHROMA_WRITER_THREADS")
+
+    # Manifest of file fingerprints from the last clean /sync (default: inside chroma_db_path)
+    sync_manifest_path: Optional[str] = Field(None, env="SYNC_MANIFEST_PATH")
+
     # New: directories to exclude during walking (relative directory names)
     exclude_dirs: List[str] = Field(
         default=["chroma_db", ".git"],
@@ -27,6 +53,36 @@ class Settings(BaseSettings):
     # Optional sentence-transformers model name (Hugging Face / sentence-transformers)
     sentence_transformer_model: Optional[str] = Field(None, env="SENTENCE_TRANSFORMER_MODEL")
 
+    # Intra-op threads used by the embedding model (keeps concurrent /query and /sync
+    # from oversubscribing the CPU). Set to 0 to use the torch default (one per core).
+    embedding_threads: int = Field(2, env="EMBEDDING_THREADS")
+
+    # Device for the embedding model ("cuda", "cpu", "mps", ...; default: cuda when available)
+    embedding_device: Optional[str] = Field(None, env="EMBEDDING_DEVICE")
+    # Run the torch model in float16 when on a CUDA device (ignored on CPU)
+    embedding_fp16: bool = Field(False, env="EMBEDDING_FP16")
+    # Texts per forward pass when embedding chunks
+    embedding_batch_size: int = Field(64, env="EMBEDDING_BATCH_SIZE")
+    # Inference backend: "torch", or "onnx" / "openvino" (needs sentence-transformers[onnx]
+    # / [openvino]); EMBEDDING_MODEL_FILE selects an exported graph such as
+    # "onnx/model_qint8_avx512.onnx" for int8 dynamic quantization
+    embedding_backend: str = Field("torch", env="EMBEDDING_BACKEND")
+    embedding_model_file: Optional[str] = Field(None, env="EMBEDDING_MODEL_FILE")
+    # CPU only: worker processes for bulk chunk embedding (each loads its own model copy;
+    # 0 or 1 keeps encoding in-process)
+    embedding_processes: int = Field(0, env="EMBEDDING_PROCESSES")
+
+    # SQLite cache of chunk embeddings keyed by content hash (default: inside chroma_db_path)
+    embedding_cache_path: Optional[str] = Field(None, env="EMBEDDING_CACHE_PATH")
+    # Most cached vectors kept; the oldest-written are evicted past it (0 = unbounded)
+    embedding_cache_max_rows: int = Field(500000, env="EMBEDDING_CACHE_MAX_ROWS")
+
+    # /query result cache (entries are also dropped whenever the index changes); 0 disables
+    query_cache_size: int = Field(1024, env="QUERY_CACHE_SIZE")
+    query_cache_ttl: float = Field(60.0, env="QUERY_CACHE_TTL")
+    # Prompt -> embedding LRU used by /query (survives index writes)
+    query_embedding_cache_size: int = Field(4096, env="QUERY_EMBEDDING_CACHE_SIZE")
+
     # Whisper API Configuration (for audio transcription)
     whisper_api_url: str = Field("https://whisper.hlab.cam/transcribe", env="WHISPER_API_URL")
     whisper_api_timeout: int = Field(300, env="WHISPER_API_TIMEOUT")
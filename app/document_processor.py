@@ -1,7 +1,9 @@
 """Document processing module for parsing and chunking a variety of document types."""
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import UnstructuredMarkdownLoader
@@ -15,6 +17,35 @@ logger.setLevel(logging.INFO)
 # If you later want token-aware chunking, replace with tiktoken-based splitter
 text_splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=0)
 
+# Document root, resolved once at startup rather than on every call/request
+MARKDOWN_DIR = Path(settings.markdown_dir).resolve()
+
+# Allowed extensions (settings normalizes them to a lowercase, leading-dot frozenset)
+ALLOWED_EXTS = settings.allowed_extensions
+
+
+def content_hasher():
+    """Return a fresh hasher for the content_hash chunk metadata (shared with /upload)."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def file_content_hash(file_path: Path) -> str:
+    """Hash a file's bytes the way they are recorded in content_hash metadata."""
+    with open(file_path, "rb") as f:
+        # Let hashlib stream the file in C with its own reusable buffer; unlike an mmap,
+        # a file truncated mid-hash just ends early instead of raising SIGBUS
+        return hashlib.file_digest(f, content_hasher).hexdigest()
+
+
+def _fingerprint_metadata(file_path: Path) -> dict:
+    """Return the on-disk fingerprint stored with every chunk.
+
+    mtime/size let /sync spot edits without reading files; content_hash lets
+    /upload and /index_file recognise bytes that are already indexed.
+    """
+    st = file_path.stat()
+    return {"file_mtime_ns": st.st_mtime_ns, "file_size": st.st_size, "content_hash": file_content_hash(file_path)}
+
 
 class DocumentProcessor:
     """Processes documents for indexing."""
@@ -73,9 +104,7 @@ class DocumentProcessor:
             raise ValueError(f"Invalid directory path: {e}")
 
         # Build allowed extensions and exclude list from settings (fall back to defaults)
-        allowed_exts = {ext.lower() for ext in getattr(settings, "allowed_extensions", [
-            ".md", ".markdown", ".pdf", ".docx", ".pptx", ".html", ".htm", ".txt", ".csv", ".png", ".jpg", ".jpeg", ".tiff", ".tif"
-        ])}
+        allowed_exts = ALLOWED_EXTS
         exclude_dirs = set(getattr(settings, "exclude_dirs", ["chroma_db", ".git"]))
 
         # Lazy import of extractor so we don't hard-fail if not present during earlier phases
@@ -86,61 +115,76 @@ class DocumentProcessor:
 
         # Recursively walk tree and pick files with allowed extensions, excluding exclude_dirs
         all_files = list(docs_dir.rglob("*"))
-        candidate_files = [p for p in all_files if p.is_file() and p.suffix.lower() in allowed_exts]
+        # Extension check first: it is a string test, while is_file() costs a stat per entry
+        candidate_files = [p for p in all_files if p.suffix.lower() in allowed_exts and p.is_file()]
         if not candidate_files:
             raise ValueError(f"No supported documents found in {directory}")
 
+        files_to_load = []
         for file_path in candidate_files:
             if self._is_excluded(file_path, docs_dir, exclude_dirs):
                 # skip files in excluded directories
                 print(f"Excluding file in excluded dir: {file_path}")
                 continue
+            files_to_load.append(file_path)
 
-            try:
-                suffix = file_path.suffix.lower()
-                print(f"Processing file: {suffix} - {file_path}")
-                rel_source = str(file_path.relative_to(docs_dir))
-                print(f"Loading document: {rel_source}")
-                # Markdown: use UnstructuredMarkdownLoader to preserve structure
-                if suffix in {".md", ".markdown"}:
-                    loader = UnstructuredMarkdownLoader(str(file_path))
-                    file_docs = loader.load()
-                    for doc in file_docs:
-                        doc.metadata["source"] = rel_source
-                        doc.metadata["filename"] = file_path.name
-                    documents.extend(file_docs)
-                    continue
-
-                # For non-markdown types: use the extractors module if available
-                if generic_extract:
-                    print(f"Using generic extractor for: {file_path}")
-                    pieces = generic_extract(str(file_path))
-                    for p in pieces:
-                        text = p.get("text", "")
-                        md = p.get("metadata", {}).copy()
-                        # ensure source and filename metadata exist and use relative paths
-                        md.setdefault("source", rel_source)
-                        md.setdefault("filename", file_path.name)
-                        # Create langchain Document
-                        documents.append(Document(page_content=text, metadata=md))
-                    continue
-
-                # Fallback: attempt to read plain text
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        text = f.read()
-                    if text.strip():
-                        documents.append(Document(page_content=text, metadata={"source": rel_source, "filename": file_path.name}))
-                except Exception:
-                    print(f"Skipping unsupported file: {file_path}")
-                    continue
-
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-                continue
+        # Extraction is dominated by I/O, OCR/whisper subprocesses and HTTP calls, so load
+        # files on a thread pool; map() keeps the original file order
+        workers = max(1, min(getattr(settings, "index_workers", 1), len(files_to_load)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as executor:
+            for file_docs in executor.map(lambda fp: self._load_file(fp, docs_dir, generic_extract), files_to_load):
+                documents.extend(file_docs)
 
         return documents
 
+    def _load_file(self, file_path: Path, docs_dir: Path, generic_extract) -> List[Document]:
+        """Load one file for load_documents; errors are reported and yield no documents."""
+        try:
+            suffix = file_path.suffix.lower()
+            print(f"Processing file: {suffix} - {file_path}")
+            rel_source = str(file_path.relative_to(docs_dir))
+            fingerprint = _fingerprint_metadata(file_path)
+            print(f"Loading document: {rel_source}")
+            # Markdown: use UnstructuredMarkdownLoader to preserve structure
+            if suffix in {".md", ".markdown"}:
+                loader = UnstructuredMarkdownLoader(str(file_path))
+                file_docs = loader.load()
+                for doc in file_docs:
+                    doc.metadata["source"] = rel_source
+                    doc.metadata["filename"] = file_path.name
+                    doc.metadata.update(fingerprint)
+                return file_docs
+
+            # For non-markdown types: use the extractors module if available
+            if generic_extract:
+                print(f"Using generic extractor for: {file_path}")
+                file_docs = []
+                pieces = generic_extract(str(file_path))
+                for p in pieces:
+                    text = p.get("text", "")
+                    md = p.get("metadata", {}).copy()
+                    # ensure source and filename metadata exist and use relative paths
+                    md.setdefault("source", rel_source)
+                    md.setdefault("filename", file_path.name)
+                    md.update(fingerprint)
+                    # Create langchain Document
+                    file_docs.append(Document(page_content=text, metadata=md))
+                return file_docs
+
+            # Fallback: attempt to read plain text
+            try:
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+                if text.strip():
+                    return [Document(page_content=text, metadata={"source": rel_source, "filename": file_path.name, **fingerprint})]
+            except Exception:
+                print(f"Skipping unsupported file: {file_path}")
+            return []
+
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+            return []
+
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into chunks.
 
@@ -152,18 +196,29 @@ class DocumentProcessor:
         """
         chunks = self.text_splitter.split_documents(documents)
 
-        # Add chunk metadata; make chunk_id include source to keep it unique across files
-        for i, chunk in enumerate(chunks):
+        # Add chunk metadata; make chunk_id include source to keep it unique across files.
+        # Numbered within each source, so a file's ids don't depend on which other files
+        # were chunked in the same call (/index vs /index_file) or sort before it
+        per_source: Dict[str, int] = {}
+        for chunk in chunks:
             source = chunk.metadata.get("source", "unknown")
+            i = per_source.get(source, 0)
+            per_source[source] = i + 1
             chunk.metadata["chunk_id"] = f"{source}::{i}"
+            # Lets /reindex tell unchanged chunks from edited ones without comparing text
+            hasher = content_hasher()
+            hasher.update(chunk.page_content.encode("utf-8"))
+            chunk.metadata["chunk_hash"] = hasher.hexdigest()
 
         return chunks
 
-    def process_file(self, file_path: str) -> List[Document]:
+    def process_file(self, file_path: str, fingerprint: Optional[dict] = None) -> List[Document]:
         """Load and chunk a single file.
         
         Args:
             file_path: Absolute path to the file to process
+            fingerprint: Fingerprint metadata the caller already computed (stat taken
+                before hashing); saves hashing the file a second time
             
         Returns:
             List of chunked Document objects
@@ -177,11 +232,7 @@ class DocumentProcessor:
             raise ValueError(f"{file_path} is not a file")
         
         # Check allowed extensions
-        allowed_exts = {ext.lower() for ext in getattr(settings, "allowed_extensions", [
-            ".md", ".markdown", ".pdf", ".docx", ".pptx", ".html", ".htm", ".txt", ".csv", ".png", ".jpg", ".jpeg", ".tiff", ".tif"
-        ])}
-        
-        if file_path.suffix.lower() not in allowed_exts:
+        if file_path.suffix.lower() not in ALLOWED_EXTS:
             logger.info(f"Skipping unsupported file: {file_path}")
             return []  # Skip unsupported files
         
@@ -189,12 +240,15 @@ class DocumentProcessor:
         documents = []
         # Use relative path for consistency with bulk indexing and /document endpoint compatibility
         try:
-            markdown_dir = Path(settings.markdown_dir).resolve()
-            rel_source = str(file_path.relative_to(markdown_dir))
+            rel_source = str(file_path.relative_to(MARKDOWN_DIR))
         except (ValueError, AttributeError):
             # Fallback to absolute path if file is outside markdown_dir or settings not available
             rel_source = str(file_path)
         
+        # Taken before reading, so an edit made while we extract is caught by the next sync
+        if fingerprint is None:
+            fingerprint = _fingerprint_metadata(file_path)
+        
         try:
             # Try loading with extractors first
             try:
@@ -241,6 +295,8 @@ class DocumentProcessor:
         
         # Chunk the documents
         if documents:
+            for doc in documents:
+                doc.metadata.update(fingerprint)
             chunks = self.chunk_documents(documents)
             return chunks
         
@@ -252,4 +308,30 @@ class DocumentProcessor:
         documents = self.load_documents(directory)
         chunks = self.chunk_documents(documents)
 
-        return chunks
\ No newline at end of file
+        return chunks
+
+
+# Per-process DocumentProcessor used by process_file_in_worker
+_worker_processor: Optional[DocumentProcessor] = None
+
+
+def process_file_in_worker(file_path: str, fingerprint: Optional[dict] = None) -> Tuple[List[Document], Optional[str]]:
+    """Load and chunk a single file inside a pool worker process.
+
+    Module-level so it can be pickled by ProcessPoolExecutor. Errors are
+    returned instead of raised so one bad file does not abort a whole map.
+
+    Args:
+        file_path: Absolute path to the file to process
+        fingerprint: Precomputed fingerprint metadata, as for process_file
+
+    Returns:
+        (chunks, error) where error is None on success
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor()
+    try:
+        return _worker_processor.process_file(file_path, fingerprint), None
+    except Exception as e:
+        return [], str(e)
\ No newline at end of file
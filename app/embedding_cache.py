@@ -0,0 +1,123 @@
+"""SQLite-backed cache of chunk embeddings keyed by content hash.
+
+Re-indexing an unchanged file produces identical chunk texts, so their vectors
+can be reused instead of running the embedding model again. Entries are keyed by
+(hash, provider, model) so switching models never returns stale vectors; rows
+left behind by other models are dropped, and the table is capped at max_rows.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stay well below SQLite's bound-parameter limit for "IN (...)" lookups
+_QUERY_CHUNK = 500
+
+
+def text_key(text: str) -> str:
+    """Return the cache key for a chunk's text (not the file-level content_hash metadata)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (hash, provider, model) -> vector store."""
+
+    def __init__(self, path: str, provider: str, model: str, max_rows: int = 0):
+        self.path = path
+        self.provider = provider
+        self.model = model
+        self.max_rows = max_rows
+        # Other models' rows are only dropped once per process, on the first write
+        self._pruned_models = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per operation keeps the cache safe to use from worker threads
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Created per connection: the file may be removed along with a cleared chroma_db
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "hash TEXT NOT NULL, provider TEXT NOT NULL, model TEXT NOT NULL, "
+                "vector BLOB NOT NULL, PRIMARY KEY (hash, provider, model))"
+            )
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Look up cached float32 vectors for the given hashes; misses are simply absent."""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        if not unique:
+            return found
+        try:
+            with self._connect() as conn:
+                for i in range(0, len(unique), _QUERY_CHUNK):
+                    batch = unique[i:i + _QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT hash, vector FROM embedding_cache "
+                        f"WHERE provider = ? AND model = ? AND hash IN ({placeholders})",
+                        [self.provider, self.model, *batch],
+                    )
+                    for h, blob in rows:
+                        found[h] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Store freshly computed vectors (float32) for later reuse."""
+        if not vectors:
+            return
+        rows = [
+            (h, self.provider, self.model, np.asarray(vec, dtype=np.float32).tobytes())
+            for h, vec in vectors.items()
+        ]
+        try:
+            with self._connect() as conn:
+                if not self._pruned_models:
+                    self._prune_other_models(conn)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (hash, provider, model, vector) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                if self.max_rows > 0:
+                    self._evict_oldest(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _prune_other_models(self, conn: sqlite3.Connection):
+        """Drop vectors from any other provider/model; they can never be hit again."""
+        deleted = conn.execute(
+            "DELETE FROM embedding_cache WHERE provider != ? OR model != ?",
+            (self.provider, self.model),
+        ).rowcount
+        self._pruned_models = True
+        if deleted:
+            logger.info(f"Embedding cache: dropped {deleted} vectors from other models")
+
+    def _evict_oldest(self, conn: sqlite3.Connection):
+        """Trim the table to max_rows, dropping the least recently written rows first."""
+        # INSERT OR REPLACE assigns a fresh rowid, so rowid order is write order
+        (count,) = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        excess = count - self.max_rows
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN "
+                "(SELECT rowid FROM embedding_cache ORDER BY rowid LIMIT ?)",
+                (excess,),
+            )
+            logger.info(f"Embedding cache: evicted {excess} oldest vectors")
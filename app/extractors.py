@@ -242,14 +242,11 @@ def extract_from_email(path: str) -> List[Dict]:
         with open(path, 'rb') as f:
             # Mac .emlx files have a header line with message length, skip it
             first_line = f.readline()
-            # If it looks like a length header (just digits), it's .emlx format
-            if first_line.strip().isdigit():
-                # Continue reading from current position (after the length line)
-                msg = BytesParser(policy=policy.default).parse(f)
-            else:
-                # Regular .eml file, rewind and parse from beginning
+            # If it looks like a length header (just digits), it's .emlx format;
+            # otherwise rewind and parse a regular .eml file from the beginning
+            if not first_line.strip().isdigit():
                 f.seek(0)
-                msg = BytesParser(policy=policy.default).parse(f)
+            msg = BytesParser(policy=policy.default).parse(f)
         
         # Extract metadata
         subject = msg.get('subject', '(No Subject)')
@@ -260,6 +257,8 @@ def extract_from_email(path: str) -> List[Dict]:
         # Extract body content
         body_text = ""
         if msg.is_multipart():
+            # Collect parts and join once after the walk (repeated += is quadratic)
+            body_parts: List[str] = []
             # Handle multipart messages (plain text + HTML, attachments, etc.)
             for part in msg.walk():
                 content_type = part.get_content_type()
@@ -274,12 +273,12 @@ def extract_from_email(path: str) -> List[Dict]:
                     try:
                         text = part.get_content()
                         if text:
-                            body_text += text + "\n"
+                            body_parts.append(text)
                     except Exception:
                         pass
                         
                 # Get HTML parts and convert to text
-                elif content_type == 'text/html' and not body_text:
+                elif content_type == 'text/html' and not body_parts:
                     # Only use HTML if we don't have plain text
                     try:
                         html_content = part.get_content()
@@ -290,9 +289,10 @@ def extract_from_email(path: str) -> List[Dict]:
                             script.decompose()
                         text = soup.get_text(separator='\n', strip=True)
                         if text:
-                            body_text += text + "\n"
+                            body_parts.append(text)
                     except Exception:
                         pass
+            body_text = "\n".join(body_parts)
         else:
             # Simple non-multipart message
             content_type = msg.get_content_type()
@@ -1,16 +1,32 @@
 """FastAPI application for the RAG system."""
 import os
+import asyncio
+import codecs
+import itertools
+import time
+import uuid
 import logging
+import tempfile
 import mimetypes
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
+import orjson
+try:
+    import pybase64 as base64  # SIMD-accelerated, drop-in API for b64encode
+except Exception:
+    import base64
 from fastapi import FastAPI, HTTPException, Query, UploadFile, File
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
 from app.config import settings
-from app.document_processor import DocumentProcessor
-from app.vector_store import VectorStore
-from app.query_chunks import query_chunks
+from app.document_processor import DocumentProcessor, MARKDOWN_DIR, content_hasher, file_content_hash, process_file_in_worker
+from app.vector_store import vector_store
+from app.query_chunks import query_chunks, embed_prompts
+from app.query_cache import query_cache, current_generation, bump_generation
+from app.sync_manifest import Fingerprint, load_manifest, save_manifest, clear_manifest, update_manifest_entry
 
 logger = logging.getLogger(__name__)
 
@@ -18,14 +34,172 @@ app = FastAPI(
     title="Markdown RAG System",
     description="A RAG system for indexing and querying markdown documents",
     version="0.1.0",
+    # Chunk listings can be megabytes of text; orjson encodes them much faster than json
+    default_response_class=ORJSONResponse,
 )
 
-# Initialize components
+# Initialize components. The vector store is the module singleton that query_chunks
+# also uses, so the embedding model is loaded (and warmed) only once.
 document_processor = DocumentProcessor()
-vector_store = VectorStore()
 
+# Settings already normalize this to a lowercase frozenset; keep a tuple for str.endswith
+_ALLOWED_EXTS = settings.allowed_extensions
+_ALLOWED_EXTS_TUPLE = tuple(_ALLOWED_EXTS)
 
+# /stats is polled by dashboards; serve it from a short-lived cache so bursts
+# collapse into a single backend call. Write endpoints reset the timestamp.
+STATS_CACHE_TTL = 2.0
+_stats_cache: Dict[str, Any] = {"ts": 0.0, "val": None}
+_stats_lock = asyncio.Lock()
 
+# /documents only changes when the index does: keep the last result per index generation
+_documents_cache: Dict[str, Any] = {"generation": None, "val": None}
+
+# Small pool for overlapping independent blocking I/O inside a single request
+_io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="io")
+
+# Fingerprints of the filesystem as of the last clean /sync, kept current by the
+# watcher's /index_file and /delete_file calls (stored next to the index)
+SYNC_MANIFEST_PATH = settings.sync_manifest_path or os.path.join(settings.chroma_db_path, "sync_manifest.sqlite3")
+
+
+def _invalidate_caches(manifest_entry: Optional[Tuple[str, Optional[Fingerprint]]] = None) -> None:
+    """Drop cached read results after the index has been modified.
+    
+    Args:
+        manifest_entry: (relative path, fingerprint or None if removed) when the write
+            only touched that one file; otherwise the whole sync manifest is discarded
+    """
+    _stats_cache["ts"] = 0.0
+    bump_generation()
+    if manifest_entry is not None:
+        update_manifest_entry(SYNC_MANIFEST_PATH, *manifest_entry)
+    else:
+        # The index no longer necessarily matches the last synced filesystem state
+        clear_manifest(SYNC_MANIFEST_PATH)
+
+
+MARKDOWN_DIR_STR = str(MARKDOWN_DIR)
+# Trailing separator so "/docs-other" doesn't pass as inside "/docs"
+_MARKDOWN_DIR_PREFIX = MARKDOWN_DIR_STR.rstrip(os.sep) + os.sep
+
+
+def _within_root(path: str) -> bool:
+    return path == MARKDOWN_DIR_STR or path.startswith(_MARKDOWN_DIR_PREFIX)
+
+
+def _safe_join(file_path: str) -> Path:
+    """Resolve a client-supplied relative path inside the document root.
+    
+    A string prefix check on the normalized path rejects ".." escapes without
+    touching the disk; realpath then catches symlinks inside the tree that point
+    outside it.
+    
+    Raises:
+        HTTPException(400) if the path escapes the document root
+    """
+    candidate = os.path.abspath(os.path.join(MARKDOWN_DIR_STR, file_path))
+    if _within_root(candidate):
+        resolved = os.path.realpath(candidate)
+        if resolved == candidate or _within_root(resolved):
+            return Path(resolved)
+    raise HTTPException(
+        status_code=400,
+        detail="Invalid file path: path must be within the configured document directory"
+    )
+
+
+def _snapshot_filesystem(markdown_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """Return {relative_path: (mtime_ns, size)} for every allowed file under markdown_dir.
+    
+    Walks the tree once with os.scandir, filtering by extension, instead of one
+    glob per allowed extension.
+    """
+    exts = _ALLOWED_EXTS_TUPLE
+    base = str(markdown_dir)
+    prefix_len = len(base.rstrip(os.sep)) + 1
+    snapshot = {}
+    stack = [base]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # Like the old recursive glob, don't descend into symlinked directories
+                    # (also guards against symlink cycles)
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(exts) and entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.path[prefix_len:]] = (st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory during sync scan: {e}")
+    return snapshot
+
+
+# Read size for streamed base64; a multiple of 3 so chunks encode without padding
+DOCUMENT_STREAM_CHUNK = 3 * 64 * 1024
+
+
+def _is_utf8_file(path: Path, probe_size: int = 4096) -> bool:
+    """Cheaply guess whether a file is UTF-8 text by decoding its first bytes."""
+    with open(path, "rb") as f:
+        head = f.read(probe_size)
+    try:
+        # Incremental decode tolerates a multi-byte character cut at the probe boundary
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+# MIME types that are never worth probing for UTF-8
+_BINARY_MIME_PREFIXES = ("image/", "audio/", "video/", "application/pdf", "application/vnd.",
+                         "application/zip", "application/octet-stream")
+
+
+def _binary_mime_type(path: Path) -> Optional[str]:
+    """Return the MIME type to serve a binary file with, or None for text files."""
+    mime, _ = mimetypes.guess_type(path.name)
+    if mime and mime.startswith(_BINARY_MIME_PREFIXES):
+        return mime
+    # Unknown or text-ish types (.eml is message/rfc822, .emlx is unknown): decide by content
+    if _is_utf8_file(path):
+        return None
+    return mime or "application/octet-stream"
+
+
+def _iter_base64(path: Path):
+    """Yield a file base64-encoded, one read-sized chunk at a time."""
+    with open(path, "rb") as f:
+        while chunk := f.read(DOCUMENT_STREAM_CHUNK):
+            yield base64.b64encode(chunk)
+
+
+def _process_files(paths: List[str], fingerprints: Optional[List[Optional[dict]]] = None) -> List[Tuple[List[Any], Optional[str]]]:
+    """Chunk several files, fanning out across worker processes when worthwhile.
+    
+    fingerprints optionally carries already-computed fingerprint metadata per path
+    (None entries are computed as usual).
+    
+    Returns one (chunks, error) tuple per path, in input order.
+    """
+    if fingerprints is None:
+        fingerprints = [None] * len(paths)
+    workers = settings.sync_workers or max(1, (os.cpu_count() or 2) - 1)
+    workers = min(workers, len(paths))
+    if workers <= 1 or len(paths) < settings.sync_pool_min_files:
+        results = []
+        for path, fingerprint in zip(paths, fingerprints):
+            try:
+                results.append((document_processor.process_file(path, fingerprint), None))
+            except Exception as e:
+                results.append(([], str(e)))
+        return results
+    
+    # spawn rather than fork: the parent already holds torch/Chroma threads
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        return list(executor.map(process_file_in_worker, paths, fingerprints, chunksize=8))
 
 
 class IndexResponse(BaseModel):
@@ -52,6 +226,7 @@ class SyncResponse(BaseModel):
     files_added: int
     files_removed: int
     chunks_created: int
+    files_updated: int = 0
 
 
 class ChunkData(BaseModel):
@@ -100,9 +275,25 @@ class QueryResponse(BaseModel):
     results: List[RetrievedChunk]
 
 
+# Upper bound on prompts per /query_batch call (all are embedded in one model call)
+QUERY_BATCH_MAX = 64
+
+
+class QueryBatchRequest(BaseModel):
+    """Request model for the /query_batch endpoint."""
+    prompts: List[str] = Field(..., min_length=1, max_length=QUERY_BATCH_MAX)
+    k: Optional[int] = 5
+
+
+class QueryBatchResponse(BaseModel):
+    """Response model for the /query_batch endpoint."""
+    results: List[QueryResponse]
+
+
 class DocumentRequest(BaseModel):
     """Request model for document retrieval."""
     file_path: str = Field(..., description="Relative path to the document within the markdown_docs directory")
+    inline: Optional[bool] = Field(None, description="true: always return a JSON DocumentResponse (binary content base64-encoded); false: stream the raw file (text) or base64 (binary); unset: JSON for text, raw bytes with the file's MIME type for binaries")
 
 
 class DocumentResponse(BaseModel):
@@ -133,6 +324,21 @@ class IncrementalResponse(BaseModel):
     message: str
 
 
+# Upper bound on files per /index_files or /delete_files call
+INCREMENTAL_BATCH_MAX_FILES = 100
+
+
+class IncrementalBatchRequest(BaseModel):
+    """Request model for batched incremental operations."""
+    file_paths: List[str] = Field(..., max_length=INCREMENTAL_BATCH_MAX_FILES,
+                                  description="Relative paths to files that were added/modified/deleted")
+
+
+class IncrementalBatchResponse(BaseModel):
+    """Response model for batched incremental operations, one result per file."""
+    results: List[IncrementalResponse]
+
+
 class UploadResponse(BaseModel):
     """Response model for file upload."""
     status: str
@@ -143,6 +349,119 @@ class UploadResponse(BaseModel):
     message: str
 
 
+class JobStatus(BaseModel):
+    """Status of a background index/sync job."""
+    job_id: str
+    operation: str
+    status: str = Field(..., description="pending, running, completed or failed")
+    created_at: float
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+# Upper bound on sub-requests per /batch call, to bound parallelism
+BATCH_MAX_ITEMS = 20
+
+
+class BatchItem(BaseModel):
+    """A single sub-request executed by the /batch endpoint."""
+    id: Optional[str] = Field(None, description="Client-supplied identifier echoed back in the result")
+    url: str = Field(..., description="Endpoint path, e.g. /stats or /get_chunks_for_document")
+    method: str = Field("GET", description="HTTP method of the endpoint")
+    body: Optional[Dict[str, Any]] = Field(None, description="JSON body for POST endpoints, query parameters for GET endpoints")
+
+
+class BatchRequest(BaseModel):
+    """Request model for the /batch endpoint."""
+    requests: List[BatchItem] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+
+class BatchItemResult(BaseModel):
+    """Result of a single /batch sub-request."""
+    id: Optional[str]
+    status_code: int
+    body: Any
+
+
+class BatchResponse(BaseModel):
+    """Response model for the /batch endpoint."""
+    results: List[BatchItemResult]
+
+
+# Background jobs started with ?background=true, most recent last
+JOBS_MAX = 100
+_jobs: Dict[str, JobStatus] = {}
+_job_tasks: set = set()
+
+# Index writers run in worker threads; serialize them so e.g. /sync and
+# /reindex never interleave their deletes and inserts. The lock is taken on the
+# event loop before handing off, so queued writers wait as coroutines instead of
+# parking threads of the shared to_thread pool that reads (/query, /stats) need
+_write_lock = asyncio.Lock()
+
+BACKGROUND_QUERY = Query(False, description="Return a job immediately and run in the background; poll /jobs/{job_id}")
+
+
+async def _locked(func, *args):
+    """Run a blocking index writer in a worker thread while holding the write lock."""
+    async with _write_lock:
+        return await asyncio.to_thread(func, *args)
+
+
+async def _run_job(job: JobStatus, func, *args) -> None:
+    """Execute a background job in a worker thread and record its outcome."""
+    job.status = "running"
+    try:
+        result = await _locked(func, *args)
+        job.result = result.model_dump()
+        job.status = "completed"
+    except HTTPException as e:
+        job.error = str(e.detail)
+        job.status = "failed"
+    except Exception as e:
+        job.error = str(e)
+        job.status = "failed"
+    finally:
+        job.finished_at = time.time()
+        logger.info(f"Job {job.job_id} ({job.operation}) {job.status}")
+
+
+async def _dispatch(operation: str, background: bool, func, *args):
+    """Run a blocking index writer off the event loop, optionally as a background job."""
+    if not background:
+        return await _locked(func, *args)
+    
+    job = JobStatus(job_id=uuid.uuid4().hex, operation=operation, status="pending", created_at=time.time())
+    _jobs[job.job_id] = job
+    # Forget the oldest finished jobs once over the cap
+    for job_id in [j for j, v in _jobs.items() if v.finished_at is not None][:max(0, len(_jobs) - JOBS_MAX)]:
+        del _jobs[job_id]
+    
+    task = asyncio.create_task(_run_job(job, func, *args))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return job
+
+
+def _warmup() -> None:
+    """Run one embedding and open the Chroma collection so the first request is not cold."""
+    started = time.perf_counter()
+    vector_store.embed_query("warmup")
+    vector_store._get_collection_obj().count()
+    logger.info(f"Warmup complete in {time.perf_counter() - started:.2f}s")
+
+
+@app.on_event("startup")
+async def warmup():
+    """Prime the embedder and vector store before serving traffic."""
+    try:
+        await asyncio.to_thread(_warmup)
+    except Exception as e:
+        # A cold first request is better than refusing to start
+        logger.warning(f"Warmup failed: {e}")
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -155,24 +474,38 @@ async def root():
             "/sync": "Sync filesystem with vector store (only index missing/remove deleted files)",
             "/index_file": "Index or update a single file incrementally",
             "/delete_file": "Remove a file's chunks from the index",
+            "/index_files": "Index or update several files in one request",
+            "/delete_files": "Remove several files' chunks from the index in one request",
             "/upload": "Upload a file to be automatically indexed by the watcher",
             "/get_chunks": "Retrieve indexed chunks",
+            "/get_chunks_stream": "Stream indexed chunks as NDJSON, one chunk per line",
             "/get_chunks_for_document": "Retrieve chunks for a specific document source",
             "/documents": "Get list of all indexed documents",
             "/stats": "Get collection statistics",
             "/query": "Perform similarity search on indexed documents",
+            "/query_batch": "Perform several similarity searches with one embedding call",
             "/document": "Retrieve raw content of a specific document",
+            "/batch": "Execute several read-only requests concurrently in one round-trip",
+            "/jobs/{job_id}": "Poll the status of a background index/sync job",
         }
     }
 
 
-@app.post("/index", response_model=IndexResponse)
-async def index_documents():
+@app.post("/index", response_model=Union[IndexResponse, JobStatus])
+async def index_documents(background: bool = BACKGROUND_QUERY):
     """Index markdown documents from the configured directory.
     
+    Args:
+        background: Return a JobStatus immediately instead of waiting
+    
     Returns:
-        IndexResponse with status and counts
+        IndexResponse with status and counts, or JobStatus when background is set
     """
+    return await _dispatch("index", background, _run_index)
+
+
+def _run_index() -> IndexResponse:
+    """Blocking body of /index."""
     try:
         # Process documents from configured directory
         chunks = document_processor.process_directory()
@@ -185,6 +518,7 @@ async def index_documents():
         
         # Index documents
         result = vector_store.index_documents(chunks)
+        _invalidate_caches()
         
         return IndexResponse(
             status="success",
@@ -201,13 +535,21 @@ async def index_documents():
         )
 
 
-@app.post("/reindex", response_model=ReindexResponse)
-async def reindex_documents():
+@app.post("/reindex", response_model=Union[ReindexResponse, JobStatus])
+async def reindex_documents(background: bool = BACKGROUND_QUERY):
     """Clear the existing index and reindex markdown documents.
     
+    Args:
+        background: Return a JobStatus immediately instead of waiting
+    
     Returns:
-        ReindexResponse with status and counts
+        ReindexResponse with status and counts, or JobStatus when background is set
     """
+    return await _dispatch("reindex", background, _run_reindex)
+
+
+def _run_reindex() -> ReindexResponse:
+    """Blocking body of /reindex."""
     try:
         # Process documents from configured directory
         chunks = document_processor.process_directory()
@@ -220,6 +562,7 @@ async def reindex_documents():
         
         # Reindex documents
         result = vector_store.reindex_documents(chunks)
+        _invalidate_caches()
         
         return ReindexResponse(
             status="success",
@@ -236,33 +579,54 @@ async def reindex_documents():
         )
 
 
-@app.post("/sync", response_model=SyncResponse)
-async def sync_documents():
+@app.post("/sync", response_model=Union[SyncResponse, JobStatus])
+async def sync_documents(background: bool = BACKGROUND_QUERY):
     """Synchronize filesystem with vector store - only index missing files and remove deleted ones.
     Much more efficient than a full reindex.
     
+    Args:
+        background: Return a JobStatus immediately instead of waiting
+    
     Returns:
-        SyncResponse with sync statistics
+        SyncResponse with sync statistics, or JobStatus when background is set
     """
+    return await _dispatch("sync", background, _run_sync)
+
+
+def _run_sync() -> SyncResponse:
+    """Blocking body of /sync."""
     try:
+        markdown_dir = MARKDOWN_DIR
+        manifest = load_manifest(SYNC_MANIFEST_PATH)
+        
+        # Without a manifest the index scan is needed anyway, so fetch it while walking the
+        # filesystem; with one, walk first since a match makes the index scan unnecessary
+        fingerprints_future = None
+        if manifest is None:
+            fingerprints_future = _io_pool.submit(vector_store.get_source_fingerprints)
+        
         # Get all files currently in the filesystem
-        markdown_dir = Path(settings.markdown_dir).resolve()
-        filesystem_files = set()
-        
-        for ext in settings.allowed_extensions:
-            ext_pattern = f"**/*{ext}"
-            for file_path in markdown_dir.glob(ext_pattern):
-                if file_path.is_file():
-                    # Get relative path
-                    relative_path = str(file_path.relative_to(markdown_dir))
-                    filesystem_files.add(relative_path)
-        
-        # Get all sources currently indexed in vector store
-        indexed_chunks = vector_store.get_all_chunks()
-        indexed_sources = set()
-        for chunk in indexed_chunks:
-            if "source" in chunk["metadata"]:
-                indexed_sources.add(chunk["metadata"]["source"])
+        filesystem_state = _snapshot_filesystem(markdown_dir)
+        filesystem_files = set(filesystem_state)
+        
+        # Nothing added, removed or touched since the last clean sync: skip the index scan
+        if manifest == filesystem_state:
+            logger.info(f"Sync skipped: {len(filesystem_files)} files unchanged since last sync")
+            return SyncResponse(
+                status="success",
+                message="Sync complete: no filesystem changes since last sync",
+                files_checked=len(filesystem_files),
+                files_added=0,
+                files_removed=0,
+                chunks_created=0
+            )
+        
+        # Get all sources currently indexed in vector store, with their stored fingerprints
+        if fingerprints_future is not None:
+            indexed_fingerprints = fingerprints_future.result()
+        else:
+            indexed_fingerprints = vector_store.get_source_fingerprints()
+        indexed_sources = set(indexed_fingerprints)
         
         # Find files to add (in filesystem but not in index)
         files_to_add = filesystem_files - indexed_sources
@@ -270,46 +634,124 @@ async def sync_documents():
         # Find files to remove (in index but not in filesystem)
         files_to_remove = indexed_sources - filesystem_files
         
+        # Find files edited since they were indexed (legacy chunks without a fingerprint are left alone)
+        files_to_update = {
+            file_path for file_path in filesystem_files & indexed_sources
+            if indexed_fingerprints[file_path] is not None
+            and indexed_fingerprints[file_path] != filesystem_state[file_path]
+        }
+        
+        # Touched but byte-identical files (restores, rsync, editor re-saves): restamp the
+        # stored fingerprint instead of re-chunking and re-embedding them
+        def content_hashes(file_path: str) -> Tuple[Optional[str], str]:
+            return vector_store.get_source_content_hash(file_path), file_content_hash(markdown_dir / file_path)
+        
+        # Hashing is I/O-bound and hashlib releases the GIL, so overlap the reads
+        candidates = sorted(files_to_update)
+        files_touched = set()
+        # Hashes of really-edited files, reused when they are re-chunked below
+        file_hashes: Dict[str, str] = {}
+        for file_path, (indexed_hash, current_hash) in zip(candidates, _io_pool.map(content_hashes, candidates)):
+            if indexed_hash == current_hash:
+                files_touched.add(file_path)
+            else:
+                file_hashes[file_path] = current_hash
+        if files_touched:
+            vector_store.update_source_fingerprints({file_path: filesystem_state[file_path] for file_path in files_touched})
+        files_to_update -= files_touched
+        
         logger.info(f"Sync check: {len(filesystem_files)} files in filesystem, {len(indexed_sources)} in index")
-        logger.info(f"Files to add: {len(files_to_add)}, Files to remove: {len(files_to_remove)}")
+        if files_touched:
+            logger.info(f"Files touched without content changes: {len(files_touched)}")
+        logger.info(f"Files to add: {len(files_to_add)}, Files to update: {len(files_to_update)}, Files to remove: {len(files_to_remove)}")
         
         chunks_created = 0
         files_added = 0
+        files_updated = 0
         files_removed = 0
+        errors = 0
         
-        # Remove deleted files from index
-        for file_path in files_to_remove:
-            try:
-                vector_store.delete_documents_by_source(file_path)
-                files_removed += 1
-                logger.info(f"Removed from index: {file_path}")
-            except Exception as e:
-                logger.error(f"Error removing {file_path}: {e}")
+        # Remove deleted files, and the stale chunks of edited ones, from index in one call
+        stale_sources = files_to_remove | files_to_update
+        if stale_sources:
+            delete_result = vector_store.delete_documents_by_sources(sorted(stale_sources))
+            if delete_result.get("status") == "success":
+                files_removed = len(files_to_remove)
+                logger.info(f"Removed from index: {files_removed} files ({len(files_to_update)} more to re-index)")
+            else:
+                errors += 1
+                logger.error(f"Error removing {len(stale_sources)} files: {delete_result.get('message')}")
+                # Re-adding an edited file over its old chunks would leave any surplus old
+                # chunks behind; skip them (the manifest isn't saved, so the next sync retries)
+                if files_to_update:
+                    errors += len(files_to_update)
+                    logger.error(f"Skipping re-index of {len(files_to_update)} edited files until their old chunks are removed")
+                    files_to_update = set()
+        
+        # Add missing and edited files to index: chunk them in parallel, then insert in batches
+        add_files = sorted(files_to_add | files_to_update)
+        # The snapshot stat predates the hash, like _fingerprint_metadata's own ordering
+        fingerprints = [
+            {"file_mtime_ns": filesystem_state[file_path][0], "file_size": filesystem_state[file_path][1],
+             "content_hash": file_hashes[file_path]} if file_path in file_hashes else None
+            for file_path in add_files
+        ]
+        results = _process_files([str(markdown_dir / file_path) for file_path in add_files], fingerprints)
         
-        # Add missing files to index
-        for file_path in files_to_add:
+        pending = []
+        pending_files = []
+        
+        def flush_pending():
+            nonlocal chunks_created, files_added, files_updated, errors
+            if not pending:
+                return
             try:
-                full_path = markdown_dir / file_path
-                # Process single file
-                chunks = document_processor.process_file(str(full_path))
-                if chunks:
-                    # Index the chunks
-                    vector_store.add_documents_incremental(chunks)
-                    chunks_created += len(chunks)
-                    files_added += 1
-                    logger.info(f"Added to index: {file_path} ({len(chunks)} chunks)")
+                vector_store.add_documents_incremental(pending)
+                chunks_created += len(pending)
+                for file_path, chunk_count in pending_files:
+                    if file_path in files_to_update:
+                        files_updated += 1
+                        logger.info(f"Re-indexed: {file_path} ({chunk_count} chunks)")
+                    else:
+                        files_added += 1
+                        logger.info(f"Added to index: {file_path} ({chunk_count} chunks)")
             except Exception as e:
-                logger.error(f"Error indexing {file_path}: {e}")
+                errors += 1
+                logger.error(f"Error indexing {len(pending_files)} files: {e}")
+            pending.clear()
+            pending_files.clear()
+        
+        for file_path, (chunks, error) in zip(add_files, results):
+            if error:
+                errors += 1
+                logger.error(f"Error indexing {file_path}: {error}")
+            elif chunks:
+                pending.extend(chunks)
+                pending_files.append((file_path, len(chunks)))
+                if len(pending) >= settings.sync_batch_size:
+                    flush_pending()
+        flush_pending()
         
         total_checked = len(filesystem_files)
+        # Restamped files count too: their chunk metadata changed
+        if files_added or files_updated or files_removed or files_touched:
+            _invalidate_caches()
+        
+        # Only remember this state if everything was applied, so failures are retried
+        if not errors:
+            try:
+                save_manifest(SYNC_MANIFEST_PATH, filesystem_state)
+            except Exception as e:
+                logger.warning(f"Failed to save sync manifest: {e}")
         
         return SyncResponse(
             status="success",
-            message=f"Sync complete: {files_added} added, {files_removed} removed",
+            message=f"Sync complete: {files_added} added, {files_updated} updated, {files_removed} removed",
             files_checked=total_checked,
             files_added=files_added,
             files_removed=files_removed,
-            chunks_created=chunks_created
+            chunks_created=chunks_created,
+            files_updated=files_updated
         )
         
     except Exception as e:
@@ -332,21 +774,11 @@ async def get_chunks(
         GetChunksResponse with chunks and metadata
     """
     try:
-        chunks = vector_store.get_all_chunks(limit=limit)
-        
-        chunk_data = [
-            ChunkData(
-                id=chunk["id"],
-                content=chunk["content"],
-                metadata=chunk["metadata"]
-            )
-            for chunk in chunks
-        ]
+        chunks = await asyncio.to_thread(vector_store.get_all_chunks, limit=limit)
         
-        return GetChunksResponse(
-            total_chunks=len(chunk_data),
-            chunks=chunk_data,
-        )
+        # Chunks are already {"id", "content", "metadata"} dicts; hand them straight to
+        # orjson instead of building and re-serializing a ChunkData per row
+        return ORJSONResponse({"total_chunks": len(chunks), "chunks": chunks})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -354,6 +786,29 @@ async def get_chunks(
         )
 
 
+@app.get("/get_chunks_stream")
+async def get_chunks_stream(
+    limit: Optional[int] = Query(None, description="Maximum number of chunks to return")
+):
+    """Stream indexed chunks as newline-delimited JSON.
+    
+    Chunks are read from the vector store page by page and written as they
+    arrive, so memory stays bounded and the first bytes go out immediately.
+    
+    Args:
+        limit: Optional maximum number of chunks to return
+    
+    Returns:
+        StreamingResponse of application/x-ndjson, one {"id", "content", "metadata"} per line
+    """
+    def generate():
+        for chunk in vector_store.iter_chunks(limit=limit):
+            yield orjson.dumps(chunk) + b"\n"
+    
+    # Starlette iterates sync generators in its threadpool, off the event loop
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @app.post("/get_chunks_for_document", response_model=GetChunksResponse)
 async def get_chunks_for_document(request: GetChunksForDocumentRequest):
     """Retrieve chunks for a specific document source.
@@ -367,21 +822,10 @@ async def get_chunks_for_document(request: GetChunksForDocumentRequest):
     try:
         # Convert limit=0 to None (meaning no limit)
         limit = None if request.limit == 0 else request.limit
-        chunks = vector_store.get_chunks_for_document(request.source, limit=limit)
-        
-        chunk_data = [
-            ChunkData(
-                id=chunk["id"],
-                content=chunk["content"],
-                metadata=chunk["metadata"]
-            )
-            for chunk in chunks
-        ]
+        chunks = await asyncio.to_thread(vector_store.get_chunks_for_document, request.source, limit=limit)
         
-        return GetChunksResponse(
-            total_chunks=len(chunk_data),
-            chunks=chunk_data,
-        )
+        # Same shape as GetChunksResponse; skip per-chunk model construction
+        return ORJSONResponse({"total_chunks": len(chunks), "chunks": chunks})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -397,7 +841,15 @@ async def get_stats():
         CollectionStatsResponse with collection information
     """
     try:
-        stats = vector_store.get_collection_stats()
+        stats = _stats_cache["val"]
+        if stats is None or time.monotonic() - _stats_cache["ts"] >= STATS_CACHE_TTL:
+            async with _stats_lock:
+                # Another request may have refreshed the cache while we waited
+                stats = _stats_cache["val"]
+                if stats is None or time.monotonic() - _stats_cache["ts"] >= STATS_CACHE_TTL:
+                    stats = await asyncio.to_thread(vector_store.get_collection_stats)
+                    _stats_cache["val"] = stats
+                    _stats_cache["ts"] = time.monotonic()
         return CollectionStatsResponse(
             collection_name=stats["collection_name"],
             document_count=stats["document_count"],
@@ -418,11 +870,16 @@ async def get_documents():
         GetDocumentsResponse with list of documents and their metadata
     """
     try:
-        documents = vector_store.get_indexed_documents()
-        return GetDocumentsResponse(
-            total_documents=len(documents),
-            documents=[DocumentInfo(**doc) for doc in documents]
-        )
+        # Captured before the scan, so a write landing mid-scan forces a recompute next time
+        generation = current_generation()
+        if _documents_cache["generation"] == generation:
+            documents = _documents_cache["val"]
+        else:
+            documents = await asyncio.to_thread(vector_store.get_indexed_documents)
+            _documents_cache["val"] = documents
+            _documents_cache["generation"] = generation
+        # Same shape as GetDocumentsResponse; skip per-document model construction
+        return ORJSONResponse({"total_documents": len(documents), "documents": documents})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -444,25 +901,21 @@ async def get_document(request: DocumentRequest):
         request: DocumentRequest with file_path relative to markdown_docs
         
     Returns:
-        DocumentResponse with file content and metadata
+        DocumentResponse with file content and metadata, or a streamed file
+        response when request.inline is false
     """
+    # resolve/stat/read block on disk (or NFS); keep them off the event loop
+    return await asyncio.to_thread(_read_document, request)
+
+
+def _read_document(request: DocumentRequest):
+    """Blocking body of /document."""
     try:
         # Ensure the file path is relative and safe
         file_path = request.file_path.strip().lstrip('/')
         
-        # Construct the full path within the configured markdown directory
-        markdown_dir = Path(settings.markdown_dir).resolve()
-        full_path = markdown_dir / file_path
-        
-        # Security check: ensure the resolved path is within the markdown directory
-        try:
-            full_path = full_path.resolve()
-            full_path.relative_to(markdown_dir)
-        except ValueError:
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid file path: path must be within the configured document directory"
-            )
+        # Construct the full path, rejecting anything outside the configured markdown directory
+        full_path = _safe_join(file_path)
         
         # Check if file exists
         if not full_path.exists():
@@ -478,6 +931,25 @@ async def get_document(request: DocumentRequest):
                 detail=f"Path is not a file: {file_path}"
             )
         
+        # By default binaries are sent as raw bytes rather than base64 inside JSON
+        if request.inline is None:
+            binary_mime = _binary_mime_type(full_path)
+            if binary_mime:
+                return FileResponse(full_path, media_type=binary_mime)
+        
+        # Stream instead of buffering the whole file when the client opts out of inline JSON
+        elif not request.inline:
+            if _is_utf8_file(full_path):
+                media_type = mimetypes.guess_type(full_path.name)[0] or "text/plain"
+                if full_path.suffix.lower() in (".md", ".markdown"):
+                    media_type = "text/markdown"
+                return FileResponse(full_path, media_type=media_type)
+            return StreamingResponse(
+                _iter_base64(full_path),
+                media_type="application/octet-stream",
+                headers={"Content-Transfer-Encoding": "base64"}
+            )
+        
         # Read the file content
         try:
             # Try to read as text first (UTF-8)
@@ -487,7 +959,6 @@ async def get_document(request: DocumentRequest):
         except UnicodeDecodeError:
             # If UTF-8 fails, read as binary and return base64
             with open(full_path, 'rb') as f:
-                import base64
                 content = base64.b64encode(f.read()).decode('ascii')
             content_type = "application/octet-stream"
         
@@ -511,33 +982,27 @@ async def get_document(request: DocumentRequest):
         )
 
 
-@app.post("/index_file", response_model=IncrementalResponse)
-async def index_single_file(request: IncrementalRequest):
+@app.post("/index_file", response_model=Union[IncrementalResponse, JobStatus])
+async def index_single_file(request: IncrementalRequest, background: bool = BACKGROUND_QUERY):
     """Index a single file (add new or update existing).
     
     Args:
         request: IncrementalRequest with file_path
+        background: Return a JobStatus immediately instead of waiting
         
     Returns:
-        IncrementalResponse with operation details
+        IncrementalResponse with operation details, or JobStatus when background is set
     """
+    return await _dispatch("index_file", background, _run_index_file, request)
+
+
+def _run_index_file(request: IncrementalRequest) -> IncrementalResponse:
+    """Blocking body of /index_file."""
     try:
         file_path = request.file_path.strip().lstrip('/')
         #logger.info(f"in main.py.index)signle_file Indexing single file: {file_path}")
-        # Construct full path
-        markdown_dir = Path(settings.markdown_dir).resolve()
-        full_path = markdown_dir / file_path
-
-        
-        # Security check
-        try:
-            full_path = full_path.resolve()
-            full_path.relative_to(markdown_dir)
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file path: path must be within the configured document directory"
-            )
+        # Construct full path (with security check)
+        full_path = _safe_join(file_path)
         
         # Check if file exists and is allowed
         if not full_path.exists():
@@ -554,7 +1019,7 @@ async def index_single_file(request: IncrementalRequest):
         
         # Check if file extension is allowed
         #logger.info(f"Allowed extensions: {settings.allowed_extensions}")
-        if full_path.suffix.lower() not in settings.allowed_extensions:
+        if full_path.suffix.lower() not in _ALLOWED_EXTS:
             return IncrementalResponse(
                 status="skipped",
                 operation="index_file",
@@ -563,8 +1028,40 @@ async def index_single_file(request: IncrementalRequest):
                 message=f"File extension {full_path.suffix} not in allowed extensions"
             )
         
+        # Chunks are keyed by the path relative to the document root (see process_file)
+        source = str(full_path.relative_to(MARKDOWN_DIR))
+        
+        st = full_path.stat()
+        fingerprint = (st.st_mtime_ns, st.st_size)
+        indexed = vector_store.get_source_metadata(source) or {}
+        
+        # Same (mtime_ns, size) as when indexed, the test /sync trusts too: no need to read the file.
+        # Otherwise, if the bytes are identical (e.g. a touch or a no-op save), skip re-chunking
+        # but record the new fingerprint so /sync doesn't see the file as edited
+        stat_match = (indexed.get("file_mtime_ns"), indexed.get("file_size")) == fingerprint
+        current_hash = None
+        if not stat_match and indexed.get("content_hash") is not None:
+            current_hash = file_content_hash(full_path)
+        if stat_match or (current_hash is not None and current_hash == indexed["content_hash"]):
+            if not stat_match:
+                vector_store.update_source_fingerprint(source, *fingerprint)
+                # Chunk metadata changed, so cached /document and /query results are stale
+                _invalidate_caches(manifest_entry=(source, fingerprint))
+            else:
+                update_manifest_entry(SYNC_MANIFEST_PATH, source, fingerprint)
+            return IncrementalResponse(
+                status="unchanged",
+                operation="index_file",
+                file_path=file_path,
+                chunks_affected=0,
+                message="File content unchanged since it was indexed"
+            )
+        
         # Process the single file
-        chunks = document_processor.process_file(str(full_path))
+        # Reuse the hash computed above (with the stat taken before it) instead of rehashing
+        chunks = document_processor.process_file(str(full_path), {
+            "file_mtime_ns": fingerprint[0], "file_size": fingerprint[1], "content_hash": current_hash,
+        } if current_hash is not None else None)
         
         if not chunks:
             return IncrementalResponse(
@@ -576,7 +1073,9 @@ async def index_single_file(request: IncrementalRequest):
             )
         
         # Update documents for this source (delete old, add new)
-        result = vector_store.update_documents_by_source(str(full_path), chunks)
+        result = vector_store.update_documents_by_source(source, chunks)
+        meta = chunks[0].metadata
+        _invalidate_caches(manifest_entry=(source, (meta["file_mtime_ns"], meta["file_size"])))
         
         return IncrementalResponse(
             status="success",
@@ -589,6 +1088,8 @@ async def index_single_file(request: IncrementalRequest):
     except HTTPException:
         raise
     except Exception as e:
+        # The index may be half-updated; don't let /sync trust the manifest
+        clear_manifest(SYNC_MANIFEST_PATH)
         raise HTTPException(
             status_code=500,
             detail=f"Error indexing file: {str(e)}"
@@ -605,25 +1106,21 @@ async def delete_file_from_index(request: IncrementalRequest):
     Returns:
         IncrementalResponse with deletion details
     """
+    return await _locked(_run_delete_file, request)
+
+
+def _run_delete_file(request: IncrementalRequest) -> IncrementalResponse:
+    """Blocking body of /delete_file."""
     try:
         file_path = request.file_path.strip().lstrip('/')
         
-        # Construct full path for validation
-        markdown_dir = Path(settings.markdown_dir).resolve()
-        full_path = markdown_dir / file_path
-        
-        # Security check
-        try:
-            full_path = full_path.resolve()
-            full_path.relative_to(markdown_dir)
-        except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file path: path must be within the configured document directory"
-            )
+        # Construct full path (with security check)
+        full_path = _safe_join(file_path)
         
-        # Delete documents by source (use the full resolved path as key)
-        result = vector_store.delete_documents_by_source(str(full_path))
+        # Delete documents by source (chunks store the path relative to the document root)
+        source = str(full_path.relative_to(MARKDOWN_DIR))
+        result = vector_store.delete_documents_by_source(source)
+        _invalidate_caches(manifest_entry=(source, None))
         
         return IncrementalResponse(
             status="success",
@@ -636,12 +1133,123 @@ async def delete_file_from_index(request: IncrementalRequest):
     except HTTPException:
         raise
     except Exception as e:
+        # The index may be half-updated; don't let /sync trust the manifest
+        clear_manifest(SYNC_MANIFEST_PATH)
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting file from index: {str(e)}"
         )
 
 
+def _run_incremental_batch(func, operation: str, request: IncrementalBatchRequest) -> IncrementalBatchResponse:
+    """Apply a single-file operation to each path in order, reporting failures per file."""
+    results = []
+    for file_path in request.file_paths:
+        try:
+            results.append(func(IncrementalRequest(file_path=file_path)))
+        except HTTPException as e:
+            results.append(IncrementalResponse(
+                status="error",
+                operation=operation,
+                file_path=file_path,
+                chunks_affected=0,
+                message=str(e.detail)
+            ))
+    return IncrementalBatchResponse(results=results)
+
+
+@app.post("/index_files", response_model=Union[IncrementalBatchResponse, JobStatus])
+async def index_files(request: IncrementalBatchRequest, background: bool = BACKGROUND_QUERY):
+    """Index several files in one request, as /index_file does for each.
+    
+    Saves the watcher a round-trip per file when a batch of changes arrives.
+    A failing file is reported in its result rather than failing the batch.
+    
+    Args:
+        request: IncrementalBatchRequest with file_paths
+        background: Return a JobStatus immediately instead of waiting
+        
+    Returns:
+        IncrementalBatchResponse with one result per file, or JobStatus when background is set
+    """
+    return await _dispatch("index_files", background, _run_incremental_batch, _run_index_file, "index_file", request)
+
+
+@app.post("/delete_files", response_model=IncrementalBatchResponse)
+async def delete_files_from_index(request: IncrementalBatchRequest):
+    """Remove several files' chunks from the index in one request.
+    
+    Args:
+        request: IncrementalBatchRequest with file_paths
+        
+    Returns:
+        IncrementalBatchResponse with one result per file
+    """
+    return await _locked(_run_incremental_batch, _run_delete_file, "delete_file", request)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Return the status of a background job.
+    
+    Args:
+        job_id: ID returned by an endpoint called with background=true
+        
+    Returns:
+        JobStatus with the job's state and, once finished, its result or error
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+# Read size used when streaming uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def _publish_upload(tmp_path: Path, uploads_dir: Path, filename: str, digest: str) -> Path:
+    """Atomically give a fully written upload its final name, never overwriting a file.
+    
+    On a name collision the content hash is appended (then a counter), so no
+    exists() probing loop is needed.
+    """
+    stem, ext = os.path.splitext(filename)
+    names = itertools.chain(
+        [filename, f"{stem}-{digest[:8]}{ext}"],
+        (f"{stem}-{digest[:8]}_{n}{ext}" for n in itertools.count(1)),
+    )
+    for name in names:
+        target = uploads_dir / name
+        try:
+            # link(2) fails instead of clobbering when the target exists
+            os.link(tmp_path, target)
+        except FileExistsError:
+            continue
+        except OSError:
+            # Filesystems without hard links: fall back to a checked rename
+            if target.exists():
+                continue
+            os.replace(tmp_path, target)
+            return target
+        tmp_path.unlink()
+        return target
+
+
+# General file type category reported by /upload, keyed by lowercase extension
+_UPLOAD_FILE_TYPES = {
+    '.pdf': 'pdf',
+    '.docx': 'docx', '.doc': 'docx',
+    '.pptx': 'pptx', '.ppt': 'pptx',
+    '.md': 'markdown', '.markdown': 'markdown',
+    '.txt': 'text',
+    '.html': 'html', '.htm': 'html',
+    '.csv': 'csv',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.tiff': 'image', '.tif': 'image',
+    '.wav': 'audio', '.mp3': 'audio', '.m4a': 'audio', '.flac': 'audio', '.ogg': 'audio',
+    '.eml': 'email', '.emlx': 'email',
+}
+
+
 @app.post("/upload", response_model=UploadResponse)
 async def upload_file(file: UploadFile = File(...)):
     """Upload a file to be automatically ingested by the watcher.
@@ -669,7 +1277,7 @@ async def upload_file(file: UploadFile = File(...)):
         ext_dir_name = file_ext.lstrip('.') if file_ext else 'unknown'
         
         # Create uploads/extension directory if it doesn't exist
-        markdown_dir = Path(settings.markdown_dir).resolve()
+        markdown_dir = MARKDOWN_DIR
         uploads_dir = markdown_dir / "uploads" / ext_dir_name
         uploads_dir.mkdir(parents=True, exist_ok=True)
         
@@ -677,52 +1285,57 @@ async def upload_file(file: UploadFile = File(...)):
         mime_type, _ = mimetypes.guess_type(filename)
         
         # Determine general file type category
-        if file_ext in ['.pdf']:
-            file_type = 'pdf'
-        elif file_ext in ['.docx', '.doc']:
-            file_type = 'docx'
-        elif file_ext in ['.pptx', '.ppt']:
-            file_type = 'pptx'
-        elif file_ext in ['.md', '.markdown']:
-            file_type = 'markdown'
-        elif file_ext in ['.txt']:
-            file_type = 'text'
-        elif file_ext in ['.html', '.htm']:
-            file_type = 'html'
-        elif file_ext in ['.csv']:
-            file_type = 'csv'
-        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.tif']:
-            file_type = 'image'
-        elif file_ext in ['.wav', '.mp3', '.m4a', '.flac', '.ogg']:
-            file_type = 'audio'
-        elif file_ext in ['.eml', '.emlx']:
-            file_type = 'email'
-        else:
-            file_type = 'unknown'
+        file_type = _UPLOAD_FILE_TYPES.get(file_ext, 'unknown')
         
         # Check if file extension is allowed
-        if file_ext and file_ext not in settings.allowed_extensions:
+        if file_ext and file_ext not in _ALLOWED_EXTS:
             raise HTTPException(
                 status_code=400,
-                detail=f"File type '{file_ext}' not allowed. Allowed types: {', '.join(settings.allowed_extensions)}"
+                detail=f"File type '{file_ext}' not allowed. Allowed types: {', '.join(sorted(settings.allowed_extensions))}"
             )
         
-        # Construct save path
-        save_path = uploads_dir / filename
-        
-        # Handle filename conflicts by adding a number
-        counter = 1
-        original_stem = save_path.stem
-        while save_path.exists():
-            save_path = uploads_dir / f"{original_stem}_{counter}{file_ext}"
-            counter += 1
+        # Write to a hidden temp file first: the watcher only ever sees the finished file
+        # under its final name, and there is no exists() probe racing other writers
+        size_bytes = 0
+        hasher = content_hasher()
+        tmp_fd, tmp_name = tempfile.mkstemp(dir=uploads_dir, prefix=".upload-")
+        tmp_path = Path(tmp_name)
+        try:
+            # Stream in chunks so memory stays flat for large uploads, hashing on the way through
+            with os.fdopen(tmp_fd, 'wb') as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    size_bytes += len(chunk)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        digest = hasher.hexdigest()
+        # mkstemp creates 0600 files; uploads must stay readable by the watcher and indexer
+        os.chmod(tmp_path, 0o644)
         
-        # Save the file
-        content = await file.read()
-        size_bytes = len(content)
+        # Identical bytes already indexed: drop the copy instead of re-embedding it
+        try:
+            existing_source = await asyncio.to_thread(vector_store.find_source_by_content_hash, digest)
+        except Exception as e:
+            logger.warning(f"Duplicate check failed for upload {filename}: {e}")
+            existing_source = None
+        if existing_source:
+            tmp_path.unlink(missing_ok=True)
+            return UploadResponse(
+                status="duplicate",
+                filename=filename,
+                saved_path=existing_source,
+                size_bytes=size_bytes,
+                file_type=file_type,
+                message=f"Identical content is already indexed as {existing_source}; upload discarded."
+            )
         
-        with open(save_path, 'wb') as f:
-            f.write(content)
+        try:
+            save_path = _publish_upload(tmp_path, uploads_dir, filename, digest)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
         
         # Get relative path for response
         relative_path = save_path.relative_to(markdown_dir)
@@ -748,18 +1361,123 @@ async def upload_file(file: UploadFile = File(...)):
 
 @app.post("/query", response_model=QueryResponse)
 async def query_route(request: QueryRequest):
+    # Repeated prompts are served from cache until it expires or the index changes
+    cache_key = (current_generation(), request.prompt, request.k)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
-        results = query_chunks(request.prompt, request.k)
-        return QueryResponse(
+        results = await asyncio.to_thread(query_chunks, request.prompt, request.k)
+        response = QueryResponse(
             prompt=request.prompt,
             results=[
                 RetrievedChunk(content=doc.page_content, metadata=doc.metadata)
                 for doc in results
             ]
         )
+        query_cache.set(cache_key, response)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+
+@app.post("/query_batch", response_model=QueryBatchResponse)
+async def query_batch_route(request: QueryBatchRequest):
+    """Run several similarity searches, embedding all uncached prompts in one model call.
+    
+    Args:
+        request: QueryBatchRequest with up to QUERY_BATCH_MAX prompts
+        
+    Returns:
+        QueryBatchResponse with one QueryResponse per prompt, in request order
+    """
+    try:
+        generation = current_generation()
+        responses = [query_cache.get((generation, prompt, request.k)) for prompt in request.prompts]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        
+        if missing:
+            embeddings = await asyncio.to_thread(embed_prompts, [request.prompts[i] for i in missing])
+            searches = await asyncio.gather(*(
+                asyncio.to_thread(vector_store.similarity_search_by_vector, embedding, request.k)
+                for embedding in embeddings
+            ))
+            for i, docs in zip(missing, searches):
+                response = QueryResponse(
+                    prompt=request.prompts[i],
+                    results=[
+                        RetrievedChunk(content=doc.page_content, metadata=doc.metadata)
+                        for doc in docs
+                    ]
+                )
+                query_cache.set((generation, request.prompts[i], request.k), response)
+                responses[i] = response
+        
+        return QueryBatchResponse(results=responses)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch query failed: {str(e)}")
+
+
+# Read-only handlers that /batch may dispatch to, keyed by (method, path).
+# Handlers are called directly (not over HTTP) with the sub-request body.
+_BATCH_ROUTES = {
+    ("GET", "/"): lambda body: root(),
+    ("GET", "/health"): lambda body: health_check(),
+    ("GET", "/stats"): lambda body: get_stats(),
+    ("GET", "/documents"): lambda body: get_documents(),
+    ("GET", "/get_chunks"): lambda body: get_chunks(limit=body.get("limit")),
+    ("POST", "/get_chunks_for_document"): lambda body: get_chunks_for_document(GetChunksForDocumentRequest(**body)),
+    ("POST", "/document"): lambda body: get_document(DocumentRequest(**{**body, "inline": True})),
+    ("POST", "/query"): lambda body: query_route(QueryRequest(**body)),
+}
+
+
+async def _run_batch_item(item: BatchItem) -> BatchItemResult:
+    """Execute one /batch sub-request and capture its status and body."""
+    path = item.url.split("?", 1)[0].rstrip("/") or "/"
+    handler = _BATCH_ROUTES.get((item.method.upper(), path))
+    if handler is None:
+        return BatchItemResult(
+            id=item.id,
+            status_code=404,
+            body={"detail": f"Unsupported batch route: {item.method.upper()} {path}"}
+        )
+
+    try:
+        result = await handler(item.body or {})
+    except HTTPException as e:
+        return BatchItemResult(id=item.id, status_code=e.status_code, body={"detail": e.detail})
+    except ValidationError as e:
+        return BatchItemResult(id=item.id, status_code=422, body={"detail": str(e)})
+    except Exception as e:
+        return BatchItemResult(id=item.id, status_code=500, body={"detail": str(e)})
+
+    if isinstance(result, ORJSONResponse):
+        # Handlers that bypass response_model return pre-rendered JSON
+        return BatchItemResult(id=item.id, status_code=result.status_code, body=orjson.loads(result.body))
+    if isinstance(result, BaseModel):
+        result = result.model_dump()
+    return BatchItemResult(id=item.id, status_code=200, body=result)
+
+
+@app.post("/batch", response_model=BatchResponse)
+async def batch_requests(request: BatchRequest):
+    """Execute several read-only sub-requests concurrently.
+    
+    Saves round-trips for clients that need e.g. stats, chunks and document
+    content at once. Each sub-request reports its own status code, so one
+    failing item does not fail the whole batch.
+    
+    Args:
+        request: BatchRequest with up to BATCH_MAX_ITEMS sub-requests
+        
+    Returns:
+        BatchResponse with one result per sub-request, in request order
+    """
+    results = await asyncio.gather(*(_run_batch_item(item) for item in request.requests))
+    return BatchResponse(results=list(results))
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,70 @@
+"""In-process TTL + LRU cache for /query results.
+
+Identical prompts are common (dashboards, iterative prompt tweaking), and each
+one otherwise costs an embedding call plus a vector search. Entries are keyed
+with the index generation, which is bumped on every write, so results never
+outlive the index state they were computed from.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+query_cache = TTLCache(maxsize=settings.query_cache_size, ttl=settings.query_cache_ttl)
+
+# Incremented whenever the index changes; part of every cache key
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def current_generation() -> int:
+    return _generation
+
+
+def bump_generation() -> None:
+    """Invalidate all cached query results after an index write."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    # Old-generation entries can never be hit again; free them now
+    query_cache.clear()
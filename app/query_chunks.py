@@ -1,11 +1,37 @@
+import functools
+import logging
 from typing import List
+
+import numpy as np
 from langchain_core.documents import Document
+from app.config import settings
 from app.vector_store import vector_store
 
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=settings.query_embedding_cache_size)
+def _embed_cached(prompt: str) -> np.ndarray:
+    # Query embeddings only depend on the prompt and the model, so unlike /query results
+    # they stay valid across index writes; read-only arrays keep cached values immutable
+    embedding = vector_store.embed_query(prompt)
+    embedding.flags.writeable = False
+    return embedding
+
+
 def query_chunks(prompt: str, k: int = 5) -> List[Document]:
     # Use the vector_store's embed_query helper (robust fallback) so query and documents use the same code-path
-    query_embedding = vector_store.embed_query(prompt)
-    #print(f"Embedding preview: {query_embedding[:5]}... len={len(query_embedding)}")
+    # float32 array passed straight through; Chroma takes ndarrays as-is
+    query_embedding = _embed_cached(prompt)
+    # Guarded so the slice and formatting cost nothing on the hot path unless DEBUG is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Embedding preview: %s... len=%d", query_embedding[:5], len(query_embedding))
     # Search for similar chunks
     results = vector_store.similarity_search_by_vector(query_embedding, k=k)
-    return results
\ No newline at end of file
+    return results
+
+
+def embed_prompts(prompts: List[str]) -> np.ndarray:
+    # One model call for the whole batch instead of one forward pass per prompt;
+    # iterating the (n, dim) float32 result yields one row per prompt
+    return vector_store.embed_queries(prompts)
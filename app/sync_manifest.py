@@ -0,0 +1,114 @@
+"""Persisted filesystem manifest used to short-circuit /sync.
+
+The manifest records the (mtime_ns, size) fingerprint of every file seen by the
+last successful sync. /index_file and /delete_file, which the watcher calls for
+every change it sees, keep the affected rows current; any other index write
+invalidates the whole manifest. If the live filesystem still matches it
+exactly, the index is known to be up to date and the vector store scan can be
+skipped.
+
+Stored in SQLite (WAL) so single-file updates don't rewrite the whole manifest.
+"""
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (st_mtime_ns, st_size) of a file, keyed by path relative to the documents root
+Fingerprint = Tuple[int, int]
+
+
+@contextmanager
+def _connect(path: str) -> Iterator[sqlite3.Connection]:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL)"
+        )
+        # A single 'valid' row marks a complete manifest; without it the rows mean nothing
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _is_valid(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM meta WHERE key = 'valid'").fetchone() is not None
+
+
+def load_manifest(path: str) -> Optional[Dict[str, Fingerprint]]:
+    """Load the manifest written by save_manifest.
+
+    Returns:
+        Mapping of relative path -> fingerprint, or None if there is no usable manifest
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with _connect(path) as conn:
+            if not _is_valid(conn):
+                return None
+            return {p: (mtime_ns, size) for p, mtime_ns, size in conn.execute("SELECT path, mtime_ns, size FROM files")}
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable sync manifest {path}: {e}")
+        return None
+
+
+def save_manifest(path: str, files: Dict[str, Fingerprint]) -> None:
+    """Replace the manifest with a complete snapshot, in a single transaction."""
+    with _connect(path) as conn:
+        conn.execute("DELETE FROM files")
+        conn.executemany(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            ((p, fp[0], fp[1]) for p, fp in files.items()),
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('valid', '1')")
+
+
+def update_manifest_entry(path: str, rel_path: str, fingerprint: Optional[Fingerprint]) -> None:
+    """Record that one file was (re)indexed with this fingerprint, or removed (None).
+
+    A no-op when there is no valid manifest: a partial manifest must never be
+    mistaken for a full snapshot.
+    """
+    if not os.path.exists(path):
+        return
+    try:
+        with _connect(path) as conn:
+            if not _is_valid(conn):
+                return
+            if fingerprint is None:
+                conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                    (rel_path, fingerprint[0], fingerprint[1]),
+                )
+    except Exception as e:
+        # Can't keep it accurate; make the next sync do a full comparison instead
+        logger.warning(f"Failed to update sync manifest {path}: {e}")
+        clear_manifest(path)
+
+
+def clear_manifest(path: str) -> None:
+    """Invalidate the manifest so the next sync performs a full comparison."""
+    if not os.path.exists(path):
+        return
+    try:
+        with _connect(path) as conn:
+            conn.execute("DELETE FROM meta WHERE key = 'valid'")
+            conn.execute("DELETE FROM files")
+    except Exception as e:
+        logger.warning(f"Failed to clear sync manifest {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
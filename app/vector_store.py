@@ -1,11 +1,18 @@
 """Vector store module for ChromaDB integration."""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import atexit
+import functools
+import threading
 import uuid
 import shutil
 import os
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 
 import chromadb
+import numpy as np
+import torch
 from chromadb.config import Settings as ChromaSettings
 
 from langchain_core.documents import Document
@@ -16,25 +23,113 @@ from sentence_transformers import SentenceTransformer
 from langchain_chroma import Chroma
 
 from app.config import settings
+from app.embedding_cache import EmbeddingCache, text_key
 
 logger = logging.getLogger(__name__)
 
+# Chunks per collection.upsert call when writing to the index
+UPSERT_BATCH_SIZE = max(1, settings.chroma_batch_size)
+
+# Page size when streaming chunk text out of the collection
+CHUNK_PAGE_SIZE = 1000
+
+# Page size for metadata-only scans of the collection
+METADATA_PAGE_SIZE = 10000
+
+# Max sources per where={"source": {"$in": [...]}} filter (deletes and lookups)
+DELETE_SOURCES_BATCH = 500
+
+# Max ids per collection.delete(ids=...) call
+DELETE_IDS_BATCH = 1000
+
+# Fewest texts worth fanning out to the multi-process encode pool; smaller calls
+# (queries, small upserts) are faster in-process than the inter-process transfer
+MULTI_PROCESS_MIN_TEXTS = 128
+
+# Collection metadata key recording which embedding model produced the stored vectors
+EMBEDDING_MODEL_KEY = "embedding_model"
+
+
+@functools.lru_cache(maxsize=4)
+def _load_model(model_name: str, device: str, backend: str = "torch",
+                model_file: Optional[str] = None, half: bool = False) -> SentenceTransformer:
+    """Load a SentenceTransformer once per configuration and share it across wrappers.
+
+    backend "onnx" / "openvino" need the optional extras (pip install
+    "sentence-transformers[onnx]"); model_file picks a specific exported graph,
+    e.g. "onnx/model_qint8_avx512.onnx" for dynamic int8 quantization.
+    """
+    kwargs = {}
+    if backend != "torch":
+        kwargs["backend"] = backend
+        if model_file:
+            kwargs["model_kwargs"] = {"file_name": model_file}
+    # will download (and for onnx, export) on first run if not present
+    model = SentenceTransformer(model_name, device=device, **kwargs)
+    if half:
+        # fp16 weights: roughly twice the throughput on GPU tensor cores
+        model.half()
+    return model
+
 
 class SentenceTransformerWrapper:
     """Simple wrapper providing embed_documents and embed_query to match the previous interface."""
 
     def __init__(self, model_name: str = "all-mpnet-base-v2"):
         self.model_name = model_name
-        # load SentenceTransformer model (will download on first run if not present)
-        self.model = SentenceTransformer(model_name)
+        # Cap intra-op threads so concurrent encodes don't each grab every core
+        threads = getattr(settings, "embedding_threads", 0)
+        if threads:
+            torch.set_num_threads(threads)
+        self.device = getattr(settings, "embedding_device", None) or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = getattr(settings, "embedding_batch_size", 64)
+        self.processes = getattr(settings, "embedding_processes", 0)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.backend = getattr(settings, "embedding_backend", "torch")
+        model_file = getattr(settings, "embedding_model_file", None)
+        # Half precision only makes sense for torch on a GPU; on CPU it is slower
+        self.half = bool(getattr(settings, "embedding_fp16", False)) and self.backend == "torch" and self.device.startswith("cuda")
+        # Shared: extra VectorStore instances (scripts, tests) don't reload the weights
+        self.model = _load_model(model_name, self.device, self.backend, model_file, self.half)
+        # Identifies the exact vectors produced, for the embedding cache key
+        self.model_id = model_name if self.backend == "torch" else f"{model_name}@{self.backend}:{model_file or 'default'}"
+        if self.half:
+            self.model_id += "@fp16"
+        logger.info(f"Embedding model {model_name} on {self.device} via {self.backend} (batch size {self.batch_size})")
+
+    def _multi_process_pool(self):
+        """Start the CPU encode worker pool on first use; it lives for the process."""
+        with self._pool_lock:
+            if self._pool is None:
+                logger.info(f"Starting {self.processes} embedding worker processes")
+                self._pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.processes)
+                atexit.register(self.model.stop_multi_process_pool, self._pool)
+            return self._pool
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as a contiguous (n, dim) float32 array.
+
+        SentenceTransformer.encode already sorts inputs by length before batching
+        (and restores the order), so padding per batch stays minimal. On CPU with
+        EMBEDDING_PROCESSES > 1, large inputs are spread over worker processes.
+        """
+        if self.processes > 1 and self.device == "cpu" and len(texts) >= MULTI_PROCESS_MIN_TEXTS:
+            embs = self.model.encode_multi_process(
+                texts, self._multi_process_pool(), batch_size=self.batch_size, normalize_embeddings=False
+            )
+        else:
+            embs = self.model.encode(
+                texts, batch_size=self.batch_size, show_progress_bar=False,
+                convert_to_numpy=True, normalize_embeddings=False
+            )
+        return np.asarray(embs, dtype=np.float32)
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        embs = self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=False)
-        return [e.tolist() for e in embs]
+        return self.encode(texts).tolist()
 
     def embed_query(self, text: str) -> List[float]:
-        emb = self.model.encode([text], show_progress_bar=False, convert_to_numpy=True, normalize_embeddings=False)[0]
-        return emb.tolist()
+        return self.encode([text])[0].tolist()
 
 
 class VectorStore:
@@ -49,52 +144,95 @@ class VectorStore:
         self.collection_name = settings.chroma_collection_name
         self.persist_directory = settings.chroma_db_path
         self._vectorstore: Optional[Chroma] = None
+        # One PersistentClient per store, shared by every Chroma wrapper created on it
+        self._client = None
+        self._collection_obj = None
+
+        # Background threads that persist upsert batches while the next one is embedded
+        self._writer_pool: Optional[ThreadPoolExecutor] = None
+        if settings.chroma_writer_threads > 0:
+            self._writer_pool = ThreadPoolExecutor(
+                max_workers=settings.chroma_writer_threads, thread_name_prefix="chroma-writer"
+            )
+
+        cache_path = settings.embedding_cache_path or os.path.join(self.persist_directory, "embedding_cache.sqlite3")
+        self.embedding_cache = EmbeddingCache(
+            cache_path,
+            provider="sentence-transformers",
+            model=self.embeddings.model_id,
+            max_rows=settings.embedding_cache_max_rows,
+        )
+
+    def _get_client(self):
+        """Return the store's PersistentClient, opening it on first use."""
+        if self._client is None:
+            self._client = chromadb.PersistentClient(path=self.persist_directory)
+        return self._client
+
+    def _reset_client(self):
+        """Forget the client, e.g. after its directory was removed from under it."""
+        self._client = None
+        try:
+            # Chroma caches one system per path; a stale one would keep the deleted DB open
+            chromadb.api.client.SharedSystemClient.clear_system_cache()
+        except Exception as e:
+            logger.warning(f"Failed to clear Chroma client cache: {e}")
 
     def initialize(self):
         """Initialize or load the vector store."""
+        self._collection_obj = None
         self._vectorstore = Chroma(
             collection_name=self.collection_name,
             embedding_function=self.embeddings,
-            persist_directory=self.persist_directory,
+            client=self._get_client(),
         )
         print(f"Chroma class: {self._vectorstore.__class__}")
 
     def index_documents(self, documents: List[Document]) -> Dict[str, Any]:
-        """Index documents into the vector store. Replaces/creates the collection from documents."""
-        if self._vectorstore is None:
-            self.initialize()
-
-        # Ensure unique ids
-        ids = []
-        for i, doc in enumerate(documents):
-            source = doc.metadata.get("source")
-            chunk_id = doc.metadata.get("chunk_id")
-            if source is not None and chunk_id is not None:
-                unique_id = f"{source}::{chunk_id}"
-            else:
-                unique_id = str(uuid.uuid4())
-            ids.append(unique_id)
+        """Index documents into the vector store.
 
-        # Pass explicit ids and use Chroma.from_documents (this will create/overwrite collection)
-        self._vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            collection_name=self.collection_name,
-            persist_directory=self.persist_directory,
-            ids=ids,
-        )
+        Goes through add_documents_incremental, so chunks are upserted in
+        UPSERT_BATCH_SIZE batches with embeddings from the cache instead of
+        one Chroma.from_documents call over the whole corpus.
+        """
+        result = self.add_documents_incremental(documents)
 
         return {
             "status": "success",
-            "documents_indexed": len(documents),
-            "ids": ids
+            "documents_indexed": result["documents_added"],
+            "ids": result["ids"]
         }
 
-    def embed_query(self, text: str) -> List[float]:
-        """Return a single embedding for the given text."""
-        return self.embeddings.embed_query(text)
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as an (n, dim) float32 array, reusing cached vectors and only running the model on misses."""
+        hashes = [text_key(text) for text in texts]
+        vectors = self.embedding_cache.get_many(hashes)
+
+        misses = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors:
+                misses.setdefault(h, text)
+
+        if misses:
+            fresh = self.embeddings.encode(list(misses.values()))
+            computed = dict(zip(misses.keys(), fresh))
+            self.embedding_cache.put_many(computed)
+            vectors.update(computed)
+
+        logger.info(f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectors[h] for h in hashes])
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Return a single float32 embedding for the given text."""
+        return self.embeddings.encode([text])[0]
 
-    def similarity_search_by_vector(self, embedding: List[float], k: int = 5) -> List[Document]:
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 array of query embeddings in one model call."""
+        return self.embeddings.encode(texts)
+
+    def similarity_search_by_vector(self, embedding: "np.ndarray | List[float]", k: int = 5) -> List[Document]:
         """Retrieve top-k most similar chunks to the given embedding."""
         if self._vectorstore is None:
             self.initialize()
@@ -107,35 +245,25 @@ class VectorStore:
 
         Returns:
             chroma_collection_object
-        Raises:
-            RuntimeError if no collection object is accessible.
         """
+        # Cached for the lifetime of the wrapper; initialize() (also reached after a
+        # clear, which drops the wrapper) resets it
         if self._vectorstore is None:
             self.initialize()
-
-        # If _vectorstore is a LangChain Chroma wrapper, it often stores the inner chroma collection
-        # at _vectorstore._collection. Otherwise the _vectorstore itself might be the collection.
-        try:
-            # LangChain Chroma wrapper
-            coll = getattr(self._vectorstore, "_collection", None)
-            if coll is not None:
-                return coll
-        except Exception:
-            pass
-
-        # Some wrappers expose client or underlying collection directly
-        try:
+        elif self._collection_obj is not None:
+            return self._collection_obj
+
+        # If _vectorstore is a LangChain Chroma wrapper, it stores the inner chroma collection
+        # at _vectorstore._collection; some wrappers expose it as client instead. Otherwise the
+        # _vectorstore itself might be the collection.
+        coll = getattr(self._vectorstore, "_collection", None)
+        if coll is None:
             coll = getattr(self._vectorstore, "client", None)
-            if coll is not None:
-                return coll
-        except Exception:
-            pass
-
-        # Fallback to assuming _vectorstore is already the collection
-        if self._vectorstore is not None:
-            return self._vectorstore
+        if coll is None:
+            coll = self._vectorstore
 
-        raise RuntimeError("Unable to access underlying Chroma collection object")
+        self._collection_obj = coll
+        return coll
 
     def get_all_chunks(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -146,37 +274,135 @@ class VectorStore:
 
         limit: optional integer to cap returned items (None means all).
         """
+        # Paged under the hood: no single huge Collection.get call
+        return list(self.iter_chunks(limit=limit or None))
+
+    def _iter_id_metadatas(self, page_size: int = METADATA_PAGE_SIZE):
+        """Yield (id, metadata) for every chunk, fetching one page at a time.
+
+        Only metadatas are requested, so chunk text and embeddings are never
+        transferred just to be discarded, and memory stays bounded by the page.
+        """
+        coll = self._get_collection_obj()
+        offset = 0
+        while True:
+            results = coll.get(limit=page_size, offset=offset, include=["metadatas"])
+            ids = results.get("ids") or []
+            if not ids:
+                return
+            yield from zip(ids, results.get("metadatas") or [None] * len(ids))
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
+    def _iter_metadatas(self, page_size: int = METADATA_PAGE_SIZE):
+        """Yield every non-empty chunk metadata dict (see _iter_id_metadatas)."""
+        for _, m in self._iter_id_metadatas(page_size):
+            if m:
+                yield m
+
+    def iter_chunks(self, limit: Optional[int] = None, page_size: int = CHUNK_PAGE_SIZE):
+        """Yield chunks as {"id", "content", "metadata"} dicts, one Chroma page at a time.
+
+        Never holds more than one page in memory and skips embeddings entirely.
+        """
         coll = self._get_collection_obj()
+        offset = 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = page_size if remaining is None else min(page_size, remaining)
+            results = coll.get(limit=size, offset=offset, include=["documents", "metadatas"])
+            ids = results.get("ids") or []
+            if not ids:
+                return
+            docs = results.get("documents") or [""] * len(ids)
+            metadatas = results.get("metadatas") or [None] * len(ids)
+            # Chroma returns parallel lists of equal length, so zip without per-row bounds checks
+            yield from (
+                {"id": _id, "content": content, "metadata": metadata or {}}
+                for _id, content, metadata in zip(ids, docs, metadatas)
+            )
+            if len(ids) < size:
+                return
+            offset += len(ids)
+            if remaining is not None:
+                remaining -= len(ids)
 
-        # NOTE: chroma Collection.get returns ids by default and some implementations
-        # reject 'ids' as an include value. Do NOT include 'ids' in include list.
-        # Request documents, metadatas, embeddings (embeddings optional).
-        include_fields = ["documents", "metadatas", "embeddings"]
+    def get_indexed_sources(self) -> set:
+        """Return the set of distinct source paths in the collection."""
+        return {m["source"] for m in self._iter_metadatas() if "source" in m}
 
-        # Try to call the Chroma collection get() method in a defensive way
-        try:
-            results = coll.get(limit=limit or None, include=include_fields)
-        except TypeError:
-            # Some wrappers may not accept keyword args; try positional (defensive)
-            try:
-                results = coll.get(limit or None, include_fields)
-            except Exception as e:
-                raise RuntimeError(f"Collection.get failed: {e}")
-        except Exception as e:
-            raise RuntimeError(f"Collection.get failed: {e}")
+    def get_source_fingerprints(self) -> Dict[str, Optional[tuple]]:
+        """Return {source: (file_mtime_ns, file_size)} for every indexed source.
+
+        Sources indexed before fingerprints were stored map to None.
+        """
+        fingerprints: Dict[str, Optional[tuple]] = {}
+        for m in self._iter_metadatas():
+            if "source" not in m:
+                continue
+            if "file_mtime_ns" in m and "file_size" in m:
+                fingerprints[m["source"]] = (m["file_mtime_ns"], m["file_size"])
+            else:
+                fingerprints.setdefault(m["source"], None)
+        return fingerprints
+
+    def get_source_metadata(self, source: str) -> Optional[Dict[str, Any]]:
+        """Return the metadata of one chunk of a source (its file-level fields), or None."""
+        coll = self._get_collection_obj()
+        results = coll.get(where={"source": source}, limit=1, include=["metadatas"])
+        metadatas = results.get("metadatas") or []
+        return metadatas[0] if metadatas and metadatas[0] else None
+
+    def get_source_content_hash(self, source: str) -> Optional[str]:
+        """Return the content_hash recorded for a source, or None if unknown."""
+        metadata = self.get_source_metadata(source)
+        return metadata.get("content_hash") if metadata else None
 
-        # coll.get typically returns 'ids' by default (not necessarily in include), so read it defensively
-        ids = results.get("ids", []) or []
-        docs = results.get("documents", []) or []
-        metadatas = results.get("metadatas", []) or []
+    def update_source_fingerprint(self, source: str, mtime_ns: int, size: int) -> int:
+        """Restamp a source's chunks with a new (mtime_ns, size) without re-embedding.
 
-        chunks = []
-        for i, _id in enumerate(ids):
-            content = docs[i] if i < len(docs) else ""
-            metadata = metadatas[i] if i < len(metadatas) else {}
-            chunks.append({"id": _id, "content": content, "metadata": metadata})
+        Used when a file was touched but its bytes are unchanged.
 
-        return chunks
+        Returns:
+            Number of chunks updated
+        """
+        return self.update_source_fingerprints({source: (mtime_ns, size)})
+
+    def update_source_fingerprints(self, fingerprints: Dict[str, Tuple[int, int]]) -> int:
+        """Restamp several sources at once, one get/update round trip per batch of sources.
+
+        Args:
+            fingerprints: Mapping of source -> (mtime_ns, size)
+
+        Returns:
+            Number of chunks updated
+        """
+        coll = self._get_collection_obj()
+        sources = sorted(fingerprints)
+        updated = 0
+        for i in range(0, len(sources), DELETE_SOURCES_BATCH):
+            batch = sources[i:i + DELETE_SOURCES_BATCH]
+            where = {"source": batch[0]} if len(batch) == 1 else {"source": {"$in": batch}}
+            results = coll.get(where=where, include=["metadatas"])
+            ids = results.get("ids") or []
+            if not ids:
+                continue
+            metadatas = []
+            for m in results.get("metadatas") or [{}] * len(ids):
+                m = m or {}
+                mtime_ns, size = fingerprints[m.get("source")]
+                metadatas.append({**m, "file_mtime_ns": mtime_ns, "file_size": size})
+            coll.update(ids=ids, metadatas=metadatas)
+            updated += len(ids)
+        return updated
+
+    def find_source_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Return the source of an indexed file with these exact bytes, if any."""
+        coll = self._get_collection_obj()
+        results = coll.get(where={"content_hash": content_hash}, limit=1, include=["metadatas"])
+        metadatas = results.get("metadatas") or []
+        return metadatas[0].get("source") if metadatas and metadatas[0] else None
 
     def list_chunks(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Alias kept for compatibility with older names."""
@@ -199,50 +425,46 @@ class VectorStore:
         
         # Normalize Unicode characters to handle space variants
         normalized_source_name = unicodedata.normalize('NFKC', source_name)
+        source_filename = os.path.basename(normalized_source_name)
         
-        # Get all chunks first
-        all_chunks = self.get_all_chunks(limit=None)
-        
-        # Filter by source with flexible matching
-        matching_chunks = []
-        for chunk in all_chunks:
-            metadata = chunk.get("metadata", {})
-            chunk_source = metadata.get("source", "")
+        def matches(chunk_source: str) -> bool:
             normalized_chunk_source = unicodedata.normalize('NFKC', chunk_source)
-            
             # Try multiple matching strategies:
             # 1. Exact match (after normalization)
             if normalized_chunk_source == normalized_source_name:
-                matching_chunks.append(chunk)
-                if limit is not None and len(matching_chunks) >= limit:
-                    break
-                continue
-            
+                return True
             # 2. If source_name looks like a relative path, see if chunk_source ends with it
             if not normalized_source_name.startswith('/') and normalized_chunk_source.endswith('/' + normalized_source_name):
-                matching_chunks.append(chunk)
-                if limit is not None and len(matching_chunks) >= limit:
-                    break
-                continue
-            
+                return True
             # 3. If source_name is absolute, see if it matches the relative part
-            if normalized_source_name.startswith('/'):
+            if normalized_source_name.startswith('/') and '/markdown_files/' in normalized_chunk_source:
                 # Extract relative part from chunk_source (after /app/markdown_files/)
-                if '/markdown_files/' in normalized_chunk_source:
-                    relative_part = normalized_chunk_source.split('/markdown_files/')[-1]
-                    if relative_part == normalized_source_name.lstrip('/'):
-                        matching_chunks.append(chunk)
-                        if limit is not None and len(matching_chunks) >= limit:
-                            break
-                        continue
-            
+                relative_part = normalized_chunk_source.split('/markdown_files/')[-1]
+                if relative_part == normalized_source_name.lstrip('/'):
+                    return True
             # 4. Filename-only match (after normalization)
-            source_filename = os.path.basename(normalized_source_name)
-            chunk_filename = os.path.basename(normalized_chunk_source)
-            if source_filename == chunk_filename:
-                matching_chunks.append(chunk)
-                if limit is not None and len(matching_chunks) >= limit:
-                    break
+            return os.path.basename(normalized_chunk_source) == source_filename
+        
+        # Match against the distinct sources (a metadata-only scan), then let Chroma
+        # return just the matching chunks instead of streaming every document's text
+        matched_sources = sorted(s for s in self.get_indexed_sources() if matches(s))
+        
+        coll = self._get_collection_obj()
+        matching_chunks = []
+        for i in range(0, len(matched_sources), DELETE_SOURCES_BATCH):
+            batch = matched_sources[i:i + DELETE_SOURCES_BATCH]
+            where = {"source": batch[0]} if len(batch) == 1 else {"source": {"$in": batch}}
+            remaining = None if limit is None else limit - len(matching_chunks)
+            results = coll.get(where=where, limit=remaining, include=["documents", "metadatas"])
+            ids = results.get("ids") or []
+            docs = results.get("documents") or [""] * len(ids)
+            metadatas = results.get("metadatas") or [None] * len(ids)
+            matching_chunks.extend(
+                {"id": _id, "content": content, "metadata": metadata or {}}
+                for _id, content, metadata in zip(ids, docs, metadatas)
+            )
+            if limit is not None and len(matching_chunks) >= limit:
+                break
         
         return matching_chunks
 
@@ -254,32 +476,11 @@ class VectorStore:
         if self._vectorstore is None:
             self.initialize()
 
-        coll = self._get_collection_obj()
-
-        # Primary attempt: use collection.delete() API to remove all items
+        # Primary attempt: drop the collection outright instead of enumerating and deleting
+        # every id; initialize() recreates it empty on next use
         try:
-            # First, try to get all IDs in the collection
-            try:
-                # Get all IDs to delete them explicitly
-                results = coll.get(include=[])  # Only get IDs, not documents or metadata
-                ids_to_delete = results.get("ids", [])
-                
-                if ids_to_delete:
-                    # Delete by providing specific IDs
-                    coll.delete(ids=ids_to_delete)
-                else:
-                    # Collection is already empty
-                    return {"status": "success", "cleared": True, "method": "collection_already_empty"}
-                    
-            except Exception:
-                # Fallback: try delete with where clause that matches everything
-                try:
-                    # Use a where clause that should match all documents
-                    coll.delete(where={"$or": [{"source": {"$ne": ""}}, {"source": {"$eq": ""}}]})
-                except Exception:
-                    # Last resort: try to delete by metadata catch-all
-                    coll.delete(where={})
-                    
+            self._vectorstore.delete_collection()
+            self._vectorstore = None
         except Exception as e:
             # As a fallback, remove the persist_directory and reinitialize the store.
             try:
@@ -287,26 +488,72 @@ class VectorStore:
                     shutil.rmtree(self.persist_directory)
             except Exception as e2:
                 raise RuntimeError(f"Failed to clear collection via API ({e}) and failed to remove persist directory ({e2})")
-            # Recreate an empty store instance on next initialize
+            # Recreate an empty store instance (and client) on next initialize
             self._vectorstore = None
+            self._reset_client()
             return {"status": "success", "cleared": True, "method": "persist_dir_removed"}
 
-        return {"status": "success", "cleared": True, "method": "collection.delete_called"}
+        return {"status": "success", "cleared": True, "method": "collection_dropped"}
 
     def reindex_documents(self, documents: List[Document]) -> Dict[str, Any]:
-        """Clear existing collection and index provided documents."""
-        # Clear existing collection
-        clear_res = self.clear_collection()
+        """Make the collection contain exactly the provided documents.
+
+        Instead of clearing and re-writing everything, chunks are diffed by id:
+        chunks no longer produced are deleted, and only chunks whose metadata
+        changed (including chunk_hash, set by the document processor from the
+        chunk text) are upserted. If the diff can't be
+        computed, or the collection's vectors came from a different (or unrecorded)
+        embedding model, falls back to clearing the collection and indexing all
+        documents, then records the current model in the collection metadata.
+        """
+        wanted = dict(zip(self._chunk_ids(documents), documents))
+
+        try:
+            stored_model = (self._get_collection_obj().metadata or {}).get(EMBEDDING_MODEL_KEY)
+            if stored_model != self.embeddings.model_id:
+                raise ValueError(
+                    f"collection was embedded with {stored_model or 'an unrecorded model'}, "
+                    f"current model is {self.embeddings.model_id}"
+                )
+            existing = dict(self._iter_id_metadatas())
+        except Exception as e:
+            logger.warning(f"Could not diff collection for reindex, clearing it instead: {e}")
+            clear_res = self.clear_collection()
+            index_res = self.index_documents(documents)
+            self._record_embedding_model()
+            return {"status": "success", "cleared": clear_res, "indexed": index_res}
+
+        stale_ids = [_id for _id in existing if _id not in wanted]
+        changed = [doc for _id, doc in wanted.items() if existing.get(_id) != doc.metadata]
+        logger.info(
+            f"Reindex diff: {len(wanted) - len(changed)} chunks unchanged, "
+            f"{len(changed)} to write, {len(stale_ids)} to delete"
+        )
 
-        # Re-index (index_documents will create or overwrite collection)
-        index_res = self.index_documents(documents)
+        coll = self._get_collection_obj()
+        for i in range(0, len(stale_ids), DELETE_IDS_BATCH):
+            coll.delete(ids=stale_ids[i:i + DELETE_IDS_BATCH])
+        write_res = self.add_documents_incremental(changed)
 
         return {
             "status": "success",
-            "cleared": clear_res,
-            "indexed": index_res
+            "cleared": {"status": "success", "cleared": False, "method": "diff", "deleted_count": len(stale_ids)},
+            "indexed": {
+                "status": "success",
+                "documents_indexed": len(wanted),
+                "documents_written": write_res["documents_added"],
+                "ids": list(wanted)
+            }
         }
 
+    def _record_embedding_model(self):
+        """Stamp the current embedding model id into the collection metadata."""
+        coll = self._get_collection_obj()
+        # modify() replaces the whole metadata; hnsw:* settings can't be changed after creation
+        metadata = {k: v for k, v in (coll.metadata or {}).items() if not k.startswith("hnsw:")}
+        metadata[EMBEDDING_MODEL_KEY] = self.embeddings.model_id
+        coll.modify(metadata=metadata)
+
     def get_collection_stats(self) -> Dict[str, Any]:
         """Return some basic statistics about the collection."""
         stats = {
@@ -315,20 +562,14 @@ class VectorStore:
             "document_count": 0,
         }
         try:
-            chunks = self.get_all_chunks(limit=None)
-            stats["document_count"] = len(chunks)
+            # count() is answered by Chroma without transferring any rows
+            coll = self._get_collection_obj()
+            if hasattr(coll, "count"):
+                stats["document_count"] = coll.count()
+            else:
+                stats["document_count"] = sum(1 for _ in self.iter_chunks())
         except Exception:
-            # If we can't enumerate, try alternate method by asking the underlying collection for count
-            try:
-                coll = self._get_collection_obj()
-                # Some chroma wrappers have a count() or len-like API
-                if hasattr(coll, "count"):
-                    stats["document_count"] = coll.count()
-                elif hasattr(coll, "get"):
-                    res = coll.get(limit=None, include=["documents", "metadatas"])
-                    stats["document_count"] = len(res.get("ids", []))
-            except Exception:
-                stats["document_count"] = 0
+            stats["document_count"] = 0
 
         return stats
 
@@ -339,18 +580,16 @@ class VectorStore:
             List of dicts with document info: {"source": str, "chunk_count": int, "file_type": str}
         """
         try:
-            all_chunks = self.get_all_chunks(limit=None)
-            
-            # Group chunks by source
+            # Group chunks by source (metadata only: chunk text isn't needed here)
             doc_map = {}
-            for chunk in all_chunks:
-                source = chunk.get("metadata", {}).get("source")
+            for metadata in self._iter_metadatas():
+                source = metadata.get("source")
                 if source:
                     if source not in doc_map:
                         doc_map[source] = {
                             "source": source,
                             "chunk_count": 0,
-                            "file_type": chunk.get("metadata", {}).get("file_type", "unknown")
+                            "file_type": metadata.get("file_type", "unknown")
                         }
                     doc_map[source]["chunk_count"] += 1
             
@@ -360,6 +599,18 @@ class VectorStore:
             logger.error(f"Error getting indexed documents: {e}")
             return []
 
+    @staticmethod
+    def _chunk_ids(documents: List[Document]) -> List[str]:
+        """Return the collection id for each chunk."""
+        # Deterministic "source::chunk_id" ids (so re-indexing upserts in place); random
+        # ids only for chunks missing either key, which the processor never produces
+        return [
+            f"{m['source']}::{m['chunk_id']}"
+            if m.get("source") is not None and m.get("chunk_id") is not None
+            else str(uuid.uuid4())
+            for m in (doc.metadata for doc in documents)
+        ]
+
     def add_documents_incremental(self, documents: List[Document]) -> Dict[str, Any]:
         """Add new documents to the existing collection without clearing it first.
         
@@ -379,47 +630,92 @@ class VectorStore:
             logger.info("No documents to add, returning early")
             return {"status": "success", "documents_added": 0, "ids": []}
         
-        # Generate unique IDs for new documents
-        ids = []
-        for i, doc in enumerate(documents):
-            source = doc.metadata.get("source")
-            chunk_id = doc.metadata.get("chunk_id")
-            if source is not None and chunk_id is not None:
-                unique_id = f"{source}::{chunk_id}"
-            else:
-                unique_id = str(uuid.uuid4())
-            ids.append(unique_id)
+        ids = self._chunk_ids(documents)
         
-        # Add documents in batches to avoid ChromaDB batch size limits
-        # ChromaDB has a max batch size limit (typically ~5000), so we batch to be safe
-        BATCH_SIZE = 1000  # Conservative batch size to avoid hitting limits
+        # Collapse repeated ids (e.g. the same file passed twice) keeping the last copy:
+        # Chroma rejects duplicate ids within one upsert, and earlier copies would be
+        # overwritten by later ones anyway
+        if len(set(ids)) != len(ids):
+            latest = {_id: i for i, _id in enumerate(ids)}
+            keep = sorted(latest.values())
+            logger.info(f"Dropping {len(ids) - len(keep)} duplicate chunk ids before upsert")
+            documents = [documents[i] for i in keep]
+            ids = [ids[i] for i in keep]
+        
+        # Add documents in batches: well under ChromaDB's max batch size (~5000), and small
+        # enough that each SQLite transaction and HNSW insert stays cache-friendly
+        BATCH_SIZE = UPSERT_BATCH_SIZE
         total_batches = (len(documents) + BATCH_SIZE - 1) // BATCH_SIZE  # Ceiling division
         
         logger.info(f"🚀 Starting batch processing: {len(documents)} documents in {total_batches} batches of {BATCH_SIZE}")
         print(f"🚀 Starting batch processing: {len(documents)} documents in {total_batches} batches of {BATCH_SIZE}")
         
         total_added = 0
-        
-        for i in range(0, len(documents), BATCH_SIZE):
-            batch_docs = documents[i:i + BATCH_SIZE]
-            batch_texts = [doc.page_content for doc in batch_docs]
-            batch_metadatas = [doc.metadata for doc in batch_docs]
-            batch_ids = ids[i:i + BATCH_SIZE]
-            
-            batch_num = i//BATCH_SIZE + 1
-            logger.info(f"📦 Processing batch {batch_num}/{total_batches}: {len(batch_docs)} documents")
-            print(f"📦 Processing batch {batch_num}/{total_batches}: {len(batch_docs)} documents")
-            
-            self._vectorstore.add_texts(
-                texts=batch_texts,
-                metadatas=batch_metadatas,
-                ids=batch_ids
+        coll = self._get_collection_obj()
+        # A collection this store starts from empty is known to hold only the current
+        # model's vectors; one with unrecorded existing vectors stays unrecorded
+        stored_model = (coll.metadata or {}).get(EMBEDDING_MODEL_KEY)
+        record_model = stored_model is None and coll.count() == 0
+        if stored_model is not None and stored_model != self.embeddings.model_id:
+            logger.warning(
+                f"Collection was embedded with {stored_model}, writing {self.embeddings.model_id} "
+                f"vectors into it; run /reindex to rebuild"
             )
-            
-            total_added += len(batch_docs)
+        
+        # Embedding stays on this thread (one model, no concurrent encodes) while up to
+        # chroma_writer_threads earlier batches are being persisted in the background
+        in_flight = deque()
+        
+        def collect_oldest():
+            nonlocal total_added
+            batch_num, batch_len, future = in_flight.popleft()
+            future.result()
+            total_added += batch_len
             logger.info(f"✅ Batch {batch_num}/{total_batches} completed")
             print(f"✅ Batch {batch_num}/{total_batches} completed")
         
+        try:
+            for i in range(0, len(documents), BATCH_SIZE):
+                batch_docs = documents[i:i + BATCH_SIZE]
+                batch_texts = [doc.page_content for doc in batch_docs]
+                batch_metadatas = [doc.metadata for doc in batch_docs]
+                batch_ids = ids[i:i + BATCH_SIZE]
+                
+                batch_num = i//BATCH_SIZE + 1
+                logger.info(f"📦 Processing batch {batch_num}/{total_batches}: {len(batch_docs)} documents")
+                print(f"📦 Processing batch {batch_num}/{total_batches}: {len(batch_docs)} documents")
+                
+                # Precompute embeddings through the cache so unchanged chunks skip the model
+                batch_embeddings = self._embed_documents(batch_texts)
+                upsert_kwargs = dict(
+                    ids=batch_ids,
+                    documents=batch_texts,
+                    metadatas=batch_metadatas,
+                    embeddings=batch_embeddings
+                )
+                if self._writer_pool is None:
+                    coll.upsert(**upsert_kwargs)
+                    total_added += len(batch_docs)
+                    logger.info(f"✅ Batch {batch_num}/{total_batches} completed")
+                    print(f"✅ Batch {batch_num}/{total_batches} completed")
+                    continue
+                
+                # Bound the queue so pending embeddings don't pile up in memory
+                if len(in_flight) >= settings.chroma_writer_threads:
+                    collect_oldest()
+                in_flight.append((batch_num, len(batch_docs), self._writer_pool.submit(coll.upsert, **upsert_kwargs)))
+            
+            while in_flight:
+                collect_oldest()
+        finally:
+            # On error, don't return while other batches are still writing
+            for _, _, future in in_flight:
+                future.cancel()
+            wait([future for _, _, future in in_flight])
+        
+        if record_model:
+            self._record_embedding_model()
+        
         logger.info(f"🎉 All batches completed! Successfully added {total_added} documents")
         print(f"🎉 All batches completed! Successfully added {total_added} documents")
         
@@ -445,10 +741,11 @@ class VectorStore:
         deleted_count = 0
         
         try:
-            # Find all documents with this source
+            # Find all documents with this source (ids only: the text isn't needed to delete,
+            # and the ids give the deleted_count callers report)
             results = coll.get(
                 where={"source": source_file},
-                include=["documents", "metadatas"]
+                include=[]
             )
             
             ids_to_delete = results.get("ids", [])
@@ -469,6 +766,35 @@ class VectorStore:
             "source_file": source_file
         }
     
+    def delete_documents_by_sources(self, source_files: List[str]) -> Dict[str, Any]:
+        """Delete all documents/chunks from several source files in a single call.
+        
+        Args:
+            source_files: The source file paths to delete documents for
+            
+        Returns:
+            Dict with status and the number of sources removed
+        """
+        if not source_files:
+            return {"status": "success", "sources_deleted": 0}
+        
+        if self._vectorstore is None:
+            self.initialize()
+        
+        coll = self._get_collection_obj()
+        source_files = list(source_files)
+        
+        try:
+            # Bound the size of each $in filter; one call per DELETE_SOURCES_BATCH sources
+            for i in range(0, len(source_files), DELETE_SOURCES_BATCH):
+                coll.delete(where={"source": {"$in": source_files[i:i + DELETE_SOURCES_BATCH]}})
+            logger.info(f"Deleted chunks from {len(source_files)} sources")
+        except Exception as e:
+            logger.error(f"Error deleting documents for {len(source_files)} sources: {e}")
+            return {"status": "error", "message": str(e), "sources_deleted": 0}
+        
+        return {"status": "success", "sources_deleted": len(source_files)}
+    
     def update_documents_by_source(self, source_file: str, new_documents: List[Document]) -> Dict[str, Any]:
         """Update documents for a specific source file (delete old, add new).
         
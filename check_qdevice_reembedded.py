@@ -8,34 +8,35 @@ QDEVICE_IDS = [
     "qdevice_quorum_proxmox.md::qdevice_quorum_proxmox.md::140",
 ]
 
-def cos_sim(a, b):
-    a = np.asarray(a, dtype=float)
-    b = np.asarray(b, dtype=float)
-    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-        return float("-inf")
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+def normalize_rows(m):
+    """L2-normalize each row of a float32 matrix; zero rows stay zero."""
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
 
 vs = vector_store
 vs.initialize()
 coll = vs._vectorstore._collection
 
-results = coll.get(limit=None, include=["documents", "metadatas", "embeddings"])
-ids = results.get("ids", [])
-docs = results.get("documents", [])
+# Only the chunks of interest, not the whole collection
+results = coll.get(ids=QDEVICE_IDS, include=["documents"])
+found = dict(zip(results.get("ids", []), results.get("documents", [])))
 
-# Re-embed the qdevice chunk texts directly with the embeddings provider
+# Re-embed the qdevice chunk texts and the query directly with the embeddings
+# provider, all in one forward pass
+present = [qid for qid in QDEVICE_IDS if qid in found]
 for qid in QDEVICE_IDS:
-    try:
-        idx = ids.index(qid)
-    except ValueError:
+    if qid not in found:
         print(f"{qid} not found")
-        continue
-    text = docs[idx]
-    doc_emb = vs.embeddings.embed_documents([text])[0]
-    q_emb = vs.embed_query("how do I set up qdevice")
-    print("\n---")
-    print(f"ID: {qid}")
-    print("Re-embedded doc vector length:", len(doc_emb))
-    print("Query vector length:", len(q_emb))
-    print("Cosine similarity (query vs re-embedded doc):", cos_sim(q_emb, doc_emb))
-    print("Snippet:", text[:300].replace('\n', ' '))
+if present:
+    embs = vs.embeddings.encode([found[qid] for qid in present] + ["how do I set up qdevice"])
+    doc_embs, q_emb = embs[:-1], embs[-1]
+    scores = normalize_rows(doc_embs) @ normalize_rows(q_emb)
+    for qid, doc_emb, score in zip(present, doc_embs, scores):
+        text = found[qid]
+        print("\n---")
+        print(f"ID: {qid}")
+        print("Re-embedded doc vector length:", len(doc_emb))
+        print("Query vector length:", len(q_emb))
+        print("Cosine similarity (query vs re-embedded doc):", float(score))
+        print("Snippet:", text[:300].replace('\n', ' '))
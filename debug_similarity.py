@@ -2,12 +2,11 @@
 from app.vector_store import vector_store
 import numpy as np, traceback
 
-def cos_sim(a, b):
-    a = np.asarray(a, dtype=float)
-    b = np.asarray(b, dtype=float)
-    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-        return float("-inf")
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+def normalize_rows(m):
+    """L2-normalize each row of a float32 matrix; zero rows stay zero."""
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
 
 try:
     vs = vector_store
@@ -39,19 +38,18 @@ try:
     first_emb = embeddings_list[0]
     print("Stored embedding len (first):", len(first_emb), "preview:", first_emb[:6])
 
-    sims = []
-    for i, e in enumerate(embeddings_list):
-        try:
-            score = cos_sim(q_emb, e)
-        except Exception:
-            score = float("-inf")
-        src = metadatas[i].get("source") if i < len(metadatas) and metadatas[i] else None
-        sims.append((score, ids[i], src, docs[i][:300] if i < len(docs) else ""))
+    # One (N, D) float32 matrix, normalized once: cosine scores are a single matmul
+    matrix = normalize_rows(np.vstack(embeddings_list))
+    sims = matrix @ normalize_rows(q_emb)
+    top_n = min(20, len(sims))
+    top = np.argpartition(-sims, top_n - 1)[:top_n]
+    top = top[np.argsort(-sims[top])]
 
-    sims_sorted = sorted(sims, key=lambda x: x[0], reverse=True)
     print("\nTop 20 similar chunks:")
-    for r, (score, id_, src, snippet) in enumerate(sims_sorted[:20], 1):
-        print(f"{r:02d}. score={score:.6f} id={id_} source={src}")
+    for r, i in enumerate(top, 1):
+        src = metadatas[i].get("source") if i < len(metadatas) and metadatas[i] else None
+        snippet = docs[i][:300] if i < len(docs) else ""
+        print(f"{r:02d}. score={sims[i]:.6f} id={ids[i]} source={src}")
         print(snippet.replace('\\n',' ') + "\n---")
 
 except Exception:
@@ -8,10 +8,11 @@ Usage:
 """
 import os
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List
 
 from langchain_core.documents import Document
-from app.vector_store import vector_store  # uses your existing Chroma wrapper
 from app.extractors import extract
 from app.chunker import chunk_text
 
@@ -39,28 +40,36 @@ def build_documents_from_file(path: str):
     return docs
 
 def main(args):
+    # Imported here, not at module level, so spawned extraction workers (which
+    # re-import this module) don't each load the embedding model and Chroma
+    from app.vector_store import vector_store  # uses your existing Chroma wrapper
+
     input_dir = args.input_dir
+    paths = list(gather_files(input_dir))
     all_docs = []
-    for path in gather_files(input_dir):
-        print(f"Extracting: {path}")
-        docs = build_documents_from_file(path)
-        if docs:
-            all_docs.extend(docs)
-            print(f" -> {len(docs)} chunks")
+    # Extraction and chunking are CPU-bound: fan them out over processes.
+    # spawn rather than fork: the parent already holds torch/Chroma threads
+    workers = args.workers or max(1, (os.cpu_count() or 2) - 1)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        for path, docs in zip(paths, executor.map(build_documents_from_file, paths, chunksize=4)):
+            print(f"Extracted: {path}")
+            if docs:
+                all_docs.extend(docs)
+                print(f" -> {len(docs)} chunks")
     if not all_docs:
         print("No documents to index.")
         return
-    # Index in batches to avoid memory surges
-    BATCH = 200
-    for i in range(0, len(all_docs), BATCH):
-        batch = all_docs[i:i+BATCH]
-        print(f"Indexing batch {i//BATCH + 1} ({len(batch)} docs)")
-        vector_store.index_documents(batch)
+    # One call: the vector store embeds (through its cache) and upserts in
+    # CHROMA_BATCH_SIZE batches itself, overlapping writes with encoding
+    print(f"Indexing {len(all_docs)} chunks")
+    vector_store.index_documents(all_docs)
     print("Reindex complete.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input-dir", default="./docs", help="Directory containing documents to index")
     parser.add_argument("--collection", default=None, help="Optional collection name")
+    parser.add_argument("--workers", type=int, default=0, help="Extraction processes (default: one less than the CPU count)")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
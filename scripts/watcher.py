@@ -17,13 +17,19 @@ import time
 import argparse
 import logging
 import os
+import random
+import signal
+import stat
 import sys
 import threading
 import unicodedata
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Set, Optional
+from typing import Dict, FrozenSet, Set, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 
 try:
@@ -39,6 +45,7 @@ try:
         DirDeletedEvent,
         DirMovedEvent
     )
+    from watchdog.observers import Observer
     from watchdog.observers.polling import PollingObserver
 except Exception as e:
     print("Missing dependency 'watchdog'. Install: pip install watchdog requests", file=sys.stderr)
@@ -47,6 +54,9 @@ except Exception as e:
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("smart_watcher")
 
+# Cap on a batch request's timeout, in multiples of the per-file request timeout
+BATCH_TIMEOUT_MAX_FILES = 10
+
 
 def clean_filename(filename: str) -> str:
     """
@@ -71,6 +81,50 @@ def clean_filename(filename: str) -> str:
     return cleaned
 
 
+def make_session() -> requests.Session:
+    """Create an HTTP session that keeps connections to the API alive between calls."""
+    session = requests.Session()
+    # Up to 3 retries with jittered exponential backoff (so watchers don't retry in lockstep
+    # after an API restart) on connection failures and server errors, reusing the pooled
+    # connection. Timed-out requests are not re-sent: the server is
+    # most likely still working on them.
+    retry = Retry(
+        total=3,
+        read=0,
+        backoff_factor=1,
+        backoff_jitter=1.0,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+        raise_on_status=False,
+    )
+    # The pool covers the event-processing workers plus the main loop's periodic sync
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def merge_event_types(pending: Optional[str], new: str) -> str:
+    """Collapse a file's pending event with a newer one into the single action still needed.
+    
+    created+modified stays created, anything followed by deleted is deleted, and
+    deleted followed by created (a replaced file) is a modification.
+    """
+    if pending is None or new == "deleted":
+        return new
+    if pending == "created" and new == "modified":
+        return "created"
+    if pending == "deleted":
+        return "modified"
+    return new
+
+
+def response_snippet(response: requests.Response, limit: int = 200) -> str:
+    """Return the start of a streamed response body for logging, without downloading the rest."""
+    chunk = next(response.iter_content(chunk_size=limit), b"")
+    return chunk.decode(response.encoding or "utf-8", errors="replace")
+
+
 def should_clean_file(file_path: str) -> tuple[bool, str]:
     """
     Check if a file needs cleaning and return the cleaned path.
@@ -95,46 +149,80 @@ class IntelligentHandler(FileSystemEventHandler):
     def __init__(self, 
                  base_url: str,
                  watch_dir: Path,
-                 allowed_extensions: Set[str],
+                 allowed_extensions: FrozenSet[str],
                  debounce_seconds: int = 5,
                  wait_stable: int = 2,
                  bulk_threshold: int = 10,
                  request_timeout: int = 600,
-                 verify: bool = True):
+                 verify: bool = True,
+                 session: Optional[requests.Session] = None,
+                 index_workers: int = 4):
         super().__init__()
         self.base_url = base_url.rstrip('/')
         self.watch_dir = watch_dir
+        self._watch_prefix = str(watch_dir).rstrip(os.sep) + os.sep
         self.allowed_extensions = allowed_extensions
+        # Matched against the bare file name, without parsing a Path suffix per event
+        self._ext_tuple = tuple(ext.lower() for ext in allowed_extensions)
         self.debounce_seconds = debounce_seconds
         self.wait_stable = wait_stable
         self.bulk_threshold = bulk_threshold
         self.request_timeout = request_timeout
         self.verify = verify
+        # Reused for every call so retries and bursts don't pay a new TCP/TLS handshake
+        self.session = session or make_session()
         
         # Event tracking
         self._lock = threading.Lock()
-        self._pending_events: Set[str] = set()  # Track pending files
-        self._event_timer: Optional[threading.Timer] = None
+        self._pending_events: Dict[str, str] = {}  # Pending file path -> latest event type
+        # Files whose writer closed them (or that were renamed into place) since their
+        # last modification; only native observers report these (inotify IN_CLOSE_WRITE)
+        self._closed: Set[str] = set()
+        # Set by main() once the observer is chosen: True for native (local) events,
+        # False for polling, where the files may live on a server with its own clock
+        self.native_events = False
+        
+        # One long-lived worker debounces and processes events (instead of a new
+        # threading.Timer thread per event); _wake is set whenever an event arrives
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        # Cleared if the API predates /index_files and /delete_files
+        self._supports_batch = True
+        self._pool = ThreadPoolExecutor(max_workers=max(1, index_workers), thread_name_prefix="idx")
+        self._worker = threading.Thread(target=self._run, name="event-worker", daemon=True)
+        self._worker.start()
         
     def _is_allowed_file(self, file_path: Path) -> bool:
         """Check if file has an allowed extension."""
-        return file_path.suffix.lower() in self.allowed_extensions
+        return file_path.name.lower().endswith(self._ext_tuple)
     
     def _get_relative_path(self, absolute_path: str) -> str:
         """Convert absolute path to relative path within watch directory."""
-        try:
-            path = Path(absolute_path)
-            return str(path.relative_to(self.watch_dir))
-        except ValueError:
-            # Path is not within watch directory
-            return str(Path(absolute_path).name)
+        # Event paths are built from the (resolved) watch directory string, so a prefix
+        # test and slice does what Path.relative_to would
+        if absolute_path.startswith(self._watch_prefix):
+            return absolute_path[len(self._watch_prefix):]
+        # Path is not within watch directory
+        return os.path.basename(absolute_path)
     
     def _wait_for_stable(self, path: str, timeout: int = 300) -> bool:
         """Wait for file to be stable (size unchanged)."""
-        p = Path(path)
-        if not p.exists():
+        # Plain os.stat on the str path: no Path objects built per poll
+        try:
+            st = os.stat(path)
+        except OSError:
             return False
-        if p.is_dir():
+        if stat.S_ISDIR(st.st_mode):
+            return True
+        # The kernel told us the writer is done
+        with self._lock:
+            if path in self._closed:
+                self._closed.discard(path)
+                return True
+        # Already untouched for the whole stability window (typical once the debounce
+        # has elapsed): no need to poll it again. Only trusted for native observers;
+        # compares our clock with the file's mtime, which a skewed NFS server sets
+        if self.native_events and time.time() - st.st_mtime >= self.wait_stable:
             return True
 
         last_size = -1
@@ -143,7 +231,7 @@ class IntelligentHandler(FileSystemEventHandler):
         
         while True:
             try:
-                size = p.stat().st_size
+                size = os.stat(path).st_size
             except OSError:
                 time.sleep(0.5)
                 if time.time() - start > timeout:
@@ -166,54 +254,125 @@ class IntelligentHandler(FileSystemEventHandler):
             time.sleep(0.5)
     
     def _make_request(self, endpoint: str, payload: dict, operation_name: str) -> bool:
-        """Make HTTP request with retry logic."""
+        """Make HTTP request (retries are done by the session's adapter, see make_session)."""
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        max_attempts = 3
-        backoff = 1
         logger.info(f"Making request to {url} with payload: {json.dumps(payload)[:200]}")  
-        for attempt in range(1, max_attempts + 1):
-            try:
-                response = requests.post(
-                    url, 
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=self.request_timeout,
-                    verify=self.verify
-                )
-                
+        try:
+            # Streamed so error bodies are only read as far as they are logged
+            with self.session.post(
+                url, 
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=self.request_timeout,
+                verify=self.verify,
+                stream=True
+            ) as response:
                 if response.ok:
                     result = response.json()
                     logger.info(f"{operation_name} succeeded: {result.get('message', 'OK')}")
                     return True
                 else:
-                    logger.warning(f"{operation_name} returned status {response.status_code}: {response.text[:200]}")
-                    
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"{operation_name} attempt {attempt} failed: {e}")
-                
-            if attempt < max_attempts:
-                time.sleep(backoff)
-                backoff *= 2
+                    logger.warning(f"{operation_name} returned status {response.status_code}: {response_snippet(response)}")
                 
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"{operation_name} failed: {e}")
+            
         logger.error(f"All attempts failed for {operation_name}")
         return False
     
-    def _process_file_event(self, file_path: str, event_type: str):
-        """Process a single file event."""
-        path = Path(file_path)
+    def _post_batch(self, endpoint: str, relative_paths: list, operation_name: str) -> Optional[list]:
+        """POST a batched incremental request (/index_files or /delete_files).
         
-        # Skip non-allowed files
-        if not self._is_allowed_file(path):
-            logger.debug(f"Skipping {file_path} - not an allowed file type")
-            return
-            
+        Returns:
+            Per-file results, or None if the request failed. A 404 means the API has
+            no batch endpoints; _supports_batch is then cleared for good.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        logger.info(f"Making request to {url} for {len(relative_paths)} files")
+        try:
+            with self.session.post(
+                url,
+                json={"file_paths": relative_paths},
+                # The server works through the files one after another, but a hung
+                # server shouldn't stall a large batch for hours
+                timeout=self.request_timeout * min(len(relative_paths), BATCH_TIMEOUT_MAX_FILES),
+                verify=self.verify,
+                stream=True
+            ) as response:
+                if response.status_code == 404:
+                    logger.info("API has no batch endpoints, falling back to per-file requests")
+                    self._supports_batch = False
+                    return None
+                if not response.ok:
+                    logger.warning(f"{operation_name} returned status {response.status_code}: {response_snippet(response)}")
+                    return None
+                results = response.json().get("results", [])
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"{operation_name} failed: {e}")
+            return None
+        logger.info(f"{operation_name} succeeded for {len(results)} files")
+        return results
+    
+    def _process_batch(self, pending: Dict[str, str]) -> bool:
+        """Apply a batch of events with one /delete_files and one /index_files request.
+        
+        Returns:
+            False if the API doesn't support batching (nothing was applied)
+        """
+        deletes = [p for p, t in pending.items() if t == "deleted"]
+        updates = [p for p, t in pending.items() if t != "deleted"]
+        
+        # Deletes first, so a move (delete old + create new) lands in order
+        if deletes:
+            results = self._post_batch("delete_files", [self._get_relative_path(p) for p in deletes],
+                                       f"Delete {len(deletes)} files")
+            if results is None and not self._supports_batch:
+                return False
+            for result in results or []:
+                if result.get("status") == "error":
+                    logger.warning(f"Failed to delete {result.get('file_path')} from index: {result.get('message')}")
+        
+        # Stability waits overlap on the pool; unstable files are left for their next event
+        stable = []
+        for file_path, is_stable in zip(updates, self._pool.map(self._wait_for_stable, updates)):
+            if is_stable:
+                stable.append(file_path)
+            else:
+                logger.warning(f"File not stable, skipping: {file_path}")
+        if not stable:
+            return True
+        
+        results = self._post_batch("index_files", [self._get_relative_path(p) for p in stable],
+                                   f"Index {len(stable)} files")
+        if results is None:
+            if not self._supports_batch:
+                return False
+            needs_reindex = True
+        else:
+            needs_reindex = False
+            for result in results:
+                if result.get("status") == "error":
+                    logger.warning(f"Failed to index {result.get('file_path')}: {result.get('message')}")
+                    needs_reindex = True
+        if needs_reindex:
+            logger.warning("Batch indexing failed, triggering full reindex")
+            self._trigger_full_reindex()
+        return True
+    
+    def _process_file_event(self, file_path: str, event_type: str) -> bool:
+        """Process a single file event.
+        
+        Returns:
+            False if indexing failed and a full reindex is needed
+        """
+        # Extensions were already filtered when the event was queued (_add_event)
         relative_path = self._get_relative_path(file_path)
         
         if event_type in ["created", "modified"]:
             # Wait for file to be stable before indexing
             if not self._wait_for_stable(file_path):
                 logger.warning(f"File not stable, skipping: {file_path}")
-                return
+                return True
                 
             # Index or update the file
             logger.info(f"Indexing file: {relative_path}")
@@ -225,7 +384,7 @@ class IntelligentHandler(FileSystemEventHandler):
             
             if not success:
                 logger.warning(f"Failed to index {relative_path}, triggering full reindex")
-                self._trigger_full_reindex()
+                return False
                 
         elif event_type == "deleted":
             # Remove from index
@@ -237,6 +396,8 @@ class IntelligentHandler(FileSystemEventHandler):
             
             if not success:
                 logger.warning(f"Failed to delete {relative_path} from index")
+        
+        return True
     
     def _trigger_full_reindex(self):
         """Trigger a full reindex as fallback."""
@@ -247,24 +408,39 @@ class IntelligentHandler(FileSystemEventHandler):
             "Full reindex"
         )
     
-    def _schedule_batch_processing(self):
-        """Schedule batch processing of pending events."""
+    def _run(self):
+        """Worker loop: wait for events, then for debounce_seconds without new ones, then process."""
+        while True:
+            self._wake.wait()
+            # Each new event restarts the quiet period
+            while not self._stop.is_set():
+                self._wake.clear()
+                if not self._wake.wait(self.debounce_seconds):
+                    break
+            if self._stop.is_set():
+                return
+            try:
+                self._process_pending_events()
+            except Exception as e:
+                logger.error(f"Error processing pending events: {e}")
+    
+    def close(self):
+        """Stop the event worker; events still pending are left for the next sync."""
+        self._stop.set()
+        self._wake.set()
+        # Don't hang shutdown on an in-flight request; the thread is a daemon
+        self._worker.join(timeout=5)
+        self._pool.shutdown(wait=False, cancel_futures=True)
         with self._lock:
-            if self._event_timer:
-                self._event_timer.cancel()
-            
-            self._event_timer = threading.Timer(
-                self.debounce_seconds,
-                self._process_pending_events
-            )
-            self._event_timer.start()
+            dropped = len(self._pending_events)
+        if dropped:
+            logger.info(f"Discarding {dropped} pending events on shutdown")
     
     def _process_pending_events(self):
         """Process all pending events."""
+        # Swap in a fresh dict rather than copying, so the lock is held for O(1)
         with self._lock:
-            pending = self._pending_events.copy()
-            self._pending_events.clear()
-            self._event_timer = None
+            pending, self._pending_events = self._pending_events, {}
         
         if not pending:
             return
@@ -277,25 +453,48 @@ class IntelligentHandler(FileSystemEventHandler):
             self._trigger_full_reindex()
             return
         
-        # Process individual events
-        for event_info in pending:
+        # Several files: one request per operation instead of one per file
+        if self._supports_batch and len(pending) > 1 and self._process_batch(pending):
+            return
+        
+        # Process individual events concurrently, so stability waits and requests overlap
+        futures = {}
+        for file_path, event_type in pending.items():
+            logger.info(f"Processing event: {event_type} - {file_path}")
+            futures[self._pool.submit(self._process_file_event, file_path, event_type)] = (file_path, event_type)
+        
+        needs_reindex = False
+        for future in as_completed(futures):
+            file_path, event_type = futures[future]
             try:
-                file_path, event_type = event_info.split("::", 1)
-                logger.info(f"Processing event: {event_type} - {file_path}")
-                self._process_file_event(file_path, event_type)
+                if not future.result():
+                    needs_reindex = True
             except Exception as e:
-                logger.error(f"Error processing event {event_info}: {e}")
+                logger.error(f"Error processing event {event_type} - {file_path}: {e}")
+        
+        # One fallback reindex per batch, however many files failed
+        if needs_reindex:
+            self._trigger_full_reindex()
     
     def _add_event(self, file_path: str, event_type: str):
         """Add an event to the pending queue."""
         path = Path(file_path)
         
-        # Only process files, not directories
-        if path.is_dir():
+        # Skip if not an allowed file type (checked first: it needs no stat call)
+        if not self._is_allowed_file(path):
             return
             
-        # Skip if not an allowed file type
-        if not self._is_allowed_file(path):
+        # Editors emit bursts of modified events per save. If the file is already queued
+        # for indexing, another one only restarts the debounce: skip the stats and rename check
+        if event_type == "modified":
+            with self._lock:
+                queued = self._pending_events.get(file_path) in ("created", "modified")
+            if queued:
+                self._wake.set()
+                return
+            
+        # Only process files, not directories
+        if path.is_dir():
             return
             
         # Clean filename if needed (for created/modified events, not deleted)
@@ -314,42 +513,66 @@ class IntelligentHandler(FileSystemEventHandler):
                     # Continue with original path if rename fails
                     final_path = file_path
             
-        event_info = f"{final_path}::{event_type}"
-        
         with self._lock:
-            self._pending_events.add(event_info)
+            self._pending_events[final_path] = merge_event_types(self._pending_events.get(final_path), event_type)
             
-        self._schedule_batch_processing()
+        self._wake.set()
     
     # Event handlers
+    def _mark_closed(self, path: str, closed: bool):
+        # Only files we index are ever waited on (and so removed from the set again)
+        if closed and not self._is_allowed_file(Path(path)):
+            return
+        with self._lock:
+            if closed:
+                self._closed.add(path)
+            else:
+                self._closed.discard(path)
+    
     def on_created(self, event: FileSystemEvent):
         if not event.is_directory:
             logger.debug(f"File created: {event.src_path}")
+            self._mark_closed(event.src_path, False)
             self._add_event(event.src_path, "created")
     
     def on_modified(self, event: FileSystemEvent):
         if not event.is_directory:
             logger.debug(f"File modified: {event.src_path}")
+            self._mark_closed(event.src_path, False)
             self._add_event(event.src_path, "modified")
     
+    def on_closed(self, event: FileSystemEvent):
+        # A writer closed the file: it is complete, no need to poll it for stability
+        if not event.is_directory:
+            logger.debug(f"File closed after writing: {event.src_path}")
+            self._mark_closed(event.src_path, True)
+    
     def on_deleted(self, event: FileSystemEvent):
         if not event.is_directory:
             logger.debug(f"File deleted: {event.src_path}")
+            self._mark_closed(event.src_path, False)
             self._add_event(event.src_path, "deleted")
     
     def on_moved(self, event: FileSystemEvent):
         if not event.is_directory:
             logger.debug(f"File moved: {event.src_path} -> {event.dest_path}")
             # Treat move as delete old + create new
+            self._mark_closed(event.src_path, False)
             self._add_event(event.src_path, "deleted")
             self._add_event(event.dest_path, "created")
+            # Renamed into place (the usual atomic-save pattern): its content is complete
+            self._mark_closed(event.dest_path, True)
+
 
+# Used when --allowed-extensions is empty
+DEFAULT_EXTENSIONS = frozenset({".md", ".markdown", ".txt", ".pdf", ".docx", ".pptx", ".html", ".htm", ".csv",
+                                ".png", ".jpg", ".jpeg", ".tiff", ".tif"})
 
-def parse_extensions(ext_string: str) -> Set[str]:
+
+def parse_extensions(ext_string: str) -> FrozenSet[str]:
     """Parse comma-separated extension list."""
     if not ext_string:
-        return {".md", ".markdown", ".txt", ".pdf", ".docx", ".pptx", ".html", ".htm", ".csv", 
-                ".png", ".jpg", ".jpeg", ".tiff", ".tif"}
+        return DEFAULT_EXTENSIONS
     
     extensions = set()
     for ext in ext_string.split(","):
@@ -358,24 +581,64 @@ def parse_extensions(ext_string: str) -> Set[str]:
             ext = "." + ext
         if ext:
             extensions.add(ext.lower())
-    return extensions
+    return frozenset(extensions)
+
 
+# Filesystems whose change notifications can't be trusted (remote writers never
+# generate local inotify events), so they must be polled
+POLLING_FS_TYPES = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "virtiofs", "fakeowner",
+                    "grpcfuse", "fuse.sshfs", "ceph", "glusterfs", "fuse.glusterfs", "lustre"}
 
-def wait_for_health(health_url: str, timeout: int = 60, verify: bool = True) -> bool:
+
+def filesystem_type(path: Path) -> Optional[str]:
+    """Return the type of the filesystem path is mounted on, per /proc/mounts (Linux only)."""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return None
+    target = str(path)
+    best, best_type = "", None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        # Mount points escape spaces and other characters as octal (e.g. \040)
+        mount_point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1])
+        prefix = mount_point.rstrip("/") + "/"
+        if (target == mount_point or target.startswith(prefix)) and len(mount_point) >= len(best):
+            best, best_type = mount_point, fields[2]
+    return best_type
+
+
+def create_observer(watch_dir: Path, mode: str, poll_interval: int):
+    """Pick the filesystem observer: native kernel events where reliable, polling otherwise."""
+    if mode == "auto":
+        fs_type = filesystem_type(watch_dir)
+        mode = "polling" if fs_type is None or fs_type in POLLING_FS_TYPES else "native"
+        logger.info(f"  Filesystem type: {fs_type or 'unknown'} -> {mode} observer")
+    if mode == "native":
+        return Observer(timeout=poll_interval)
+    return PollingObserver(timeout=poll_interval)
+
+
+def wait_for_health(health_url: str, timeout: int = 60, verify: bool = True,
+                    session: Optional[requests.Session] = None) -> bool:
     """Wait for health endpoint to be available."""
+    http = session or requests
     start = time.time()
     backoff = 1
     
     while time.time() - start < timeout:
         try:
-            response = requests.get(health_url, timeout=5, verify=verify)
+            response = http.get(health_url, timeout=5, verify=verify)
             if response.ok:
                 logger.info("Health check passed")
                 return True
         except Exception as e:
             logger.debug(f"Health check failed: {e}")
             
-        time.sleep(backoff)
+        # Full jitter: spread health polls from several watchers over the backoff window
+        time.sleep(random.uniform(0, backoff))
         backoff = min(backoff * 2, 5)
     
     logger.warning(f"Health check timed out after {timeout}s")
@@ -393,10 +656,17 @@ def main():
                        help="Seconds to debounce events before processing")
     parser.add_argument("--poll-interval", type=int, default=5, 
                        help="Polling interval for filesystem observer")
+    parser.add_argument("--observer", choices=["auto", "polling", "native"], default="auto",
+                       help="Filesystem observer: native kernel events (inotify), polling, or auto "
+                            "(polling on network/shared filesystems such as NFS, native otherwise)")
+    parser.add_argument("--force-polling", dest="observer", action="store_const", const="polling",
+                       help="Always use the polling observer (same as --observer polling)")
     parser.add_argument("--wait-stable", type=int, default=2,
                        help="Seconds file must be stable before processing")
     parser.add_argument("--bulk-threshold", type=int, default=10,
                        help="Number of files that triggers full reindex instead of incremental")
+    parser.add_argument("--index-workers", type=int, default=4,
+                       help="Number of file events processed concurrently within a batch")
     parser.add_argument("--timeout", type=int, default=600,
                        help="HTTP request timeout in seconds for large file processing (default: 600)")
     parser.add_argument("--sync-interval", type=int, default=3600,
@@ -429,13 +699,15 @@ def main():
     else:
         logger.info(f"  Sync interval: disabled")
     
+    session = make_session()
+    
     # Wait for API to be ready
     health_url = f"{base_url}/health"
-    if not wait_for_health(health_url, verify=verify):
+    if not wait_for_health(health_url, verify=verify, session=session):
         logger.error("API health check failed, starting anyway...")
     
     # Set up observer
-    observer = PollingObserver(timeout=args.poll_interval)
+    observer = create_observer(watch_dir, args.observer, args.poll_interval)
     handler = IntelligentHandler(
         base_url=base_url,
         watch_dir=watch_dir,
@@ -444,26 +716,48 @@ def main():
         wait_stable=args.wait_stable,
         bulk_threshold=args.bulk_threshold,
         verify=verify,
-        request_timeout=args.timeout
+        request_timeout=args.timeout,
+        session=session,
+        index_workers=args.index_workers
     )
+    handler.native_events = not isinstance(observer, PollingObserver)
     
     observer.schedule(handler, str(watch_dir), recursive=True)
     
     # Track last sync time
     last_sync = time.time()
     
+    # `docker stop` sends SIGTERM: treat it like Ctrl+C so the observer shuts down cleanly
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    # Never set; waiting on it (rather than sleeping in a loop) blocks until the next
+    # sync is due, or indefinitely, while staying interruptible by signals
+    idle = threading.Event()
+    
     try:
-        observer.start()
+        try:
+            observer.start()
+        except OSError as e:
+            # e.g. inotify watch/instance limits exhausted on a large tree
+            if isinstance(observer, PollingObserver):
+                raise
+            logger.warning(f"Native observer failed to start ({e}), falling back to polling")
+            observer = PollingObserver(timeout=args.poll_interval)
+            handler.native_events = False
+            observer.schedule(handler, str(watch_dir), recursive=True)
+            observer.start()
         logger.info("Watcher started successfully")
         while True:
-            time.sleep(1)
+            if args.sync_interval <= 0:
+                idle.wait()
+                continue
+            idle.wait(max(0.0, last_sync + args.sync_interval - time.time()))
             
             # Periodic sync check
-            if args.sync_interval > 0 and time.time() - last_sync >= args.sync_interval:
+            if time.time() - last_sync >= args.sync_interval:
                 logger.info("Running periodic sync check...")
                 try:
                     sync_url = f"{base_url}/sync"
-                    response = requests.post(sync_url, timeout=args.timeout, verify=verify)
+                    response = session.post(sync_url, timeout=args.timeout, verify=verify)
                     if response.ok:
                         result = response.json()
                         logger.info(f"Sync complete: {result.get('files_added', 0)} added, "
@@ -481,6 +775,8 @@ def main():
     finally:
         observer.stop()
         observer.join()
+        handler.close()
+        session.close()
         logger.info("Watcher stopped")
     
     return 0
@@ -13,20 +13,23 @@ from app.vector_store import vector_store
 
 def create_fake_documents(count: int) -> list[Document]:
     """Create a large number of fake documents to test batch size limits."""
-    documents = []
+    # Shared filler makes each document substantial; the numbered prefix keeps every
+    # text distinct, so the embedding cache can't collapse the batch
+    filler = "This is filler text for a test document. " * 50
+    # One source string per group of 100 documents, shared by their metadata
+    sources = [f"test_batch_{b}.txt" for b in range((count + 99) // 100)]
     
-    for i in range(count):
-        doc = Document(
-            page_content=f"This is test document number {i}. " * 50,  # Make it substantial
+    return [
+        Document(
+            page_content=f"This is test document number {i}. " + filler,
             metadata={
-                "source": f"test_batch_{i // 100}.txt",  # Group into files
+                "source": sources[i // 100],  # Group into files
                 "chunk_id": f"chunk_{i}",
                 "test": True
             }
         )
-        documents.append(doc)
-    
-    return documents
+        for i in range(count)
+    ]
 
 def test_batch_size_handling():
     """Test that large document batches are handled correctly."""
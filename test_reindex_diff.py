@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that /reindex only rewrites the chunks that changed.
+Reindexes a small fake corpus twice, the second time with one extra file that
+sorts before the others; only that file's chunks should be written.
+"""
+
+import sys
+sys.path.append('/app')
+
+from langchain_core.documents import Document
+from app.document_processor import DocumentProcessor
+from app.vector_store import VectorStore
+
+# Kept apart from the real collection so the test can clear it afterwards
+TEST_COLLECTION = "test_reindex_diff"
+
+store = VectorStore()
+store.collection_name = TEST_COLLECTION
+processor = DocumentProcessor(chunk_size=200, chunk_overlap=0)
+
+def create_fake_chunks(sources: list[str]) -> list[Document]:
+    """Chunk one multi-chunk fake document per source, like /reindex does over the tree."""
+    documents = [
+        Document(
+            page_content="\n\n".join(f"Paragraph {p} of {source}. " * 5 for p in range(6)),
+            metadata={"source": source}
+        )
+        for source in sources
+    ]
+    return processor.chunk_documents(documents)
+
+def test_reindex_diff():
+    """Test that adding one early-sorting file rewrites only that file's chunks."""
+    print("Testing reindex diff...")
+
+    first = store.reindex_documents(create_fake_chunks(["b.md", "c.md"]))
+    print(f"First reindex: {first['cleared']['method']}, {first['indexed']['documents_indexed']} chunks")
+
+    chunks = create_fake_chunks(["a.md", "b.md", "c.md"])
+    expected = sum(1 for chunk in chunks if chunk.metadata["source"] == "a.md")
+    second = store.reindex_documents(chunks)
+    written = second["indexed"]["documents_written"]
+    deleted = second["cleared"].get("deleted_count")
+    print(f"Second reindex: {second['cleared']['method']}, {written} written, {deleted} deleted")
+
+    return second["cleared"]["method"] == "diff" and written == expected and deleted == 0
+
+def cleanup_test_data():
+    """Drop the test collection."""
+    print("Cleaning up test data...")
+    try:
+        result = store.clear_collection()
+        print(f"Cleanup result: {result}")
+    except Exception as e:
+        print(f"Cleanup error: {e}")
+
+if __name__ == "__main__":
+    try:
+        success = test_reindex_diff()
+        if success:
+            print("\n✅ Reindex diff test PASSED - only the new file's chunks were written")
+        else:
+            print("\n❌ Reindex diff test FAILED")
+            sys.exit(1)
+    finally:
+        cleanup_test_data()